@@ -0,0 +1,79 @@
+"""
+Измерение объема памяти, занимаемого описаниями полей (DataBaseField, MartField, HubMartField).
+Для каждого класса выводится количество байт на один объект для текущего представления (__slots__) и
+для представления, в котором атрибуты хранятся в словаре объекта (__dict__), как в предыдущих версиях программы.
+Строковые значения атрибутов создаются заранее и в объем памяти объектов не включаются.
+
+Пример запуска из каталога программы:
+    python -m benchmark.field_memory --count 50000
+"""
+import argparse
+import json
+import tracemalloc
+
+from core.flowcontext import DataBaseField, HubMartField, MartField
+
+
+def _dict_class(cls: type) -> type:
+    """
+    Копия класса без __slots__: атрибуты объектов хранятся в словаре
+    """
+    slots = set(getattr(cls, '__slots__', ()))
+    namespace = {name: value for name, value in vars(cls).items()
+                 if name not in slots and name not in ('__slots__', '__dict__', '__weakref__')}
+    return type(cls.__name__, (), namespace)
+
+
+def _bytes_per_object(factory, count: int) -> float:
+    tracemalloc.start()
+    objects = [factory(i) for i in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Объем памяти списка объектов не учитывается
+    return round((current - objects.__sizeof__()) / count, 1)
+
+
+def _factories(names: list[str]) -> dict:
+    """
+    Функции создания объектов: {класс: функция(класс, номер_объекта)}
+    """
+    return {
+        DataBaseField: lambda cls, i: cls(name=names[i], data_type='text', comment=names[i], is_nullable=True,
+                                          is_pk=True, is_hub_field=False),
+        MartField: lambda cls, i: cls(tgt_field=names[i], value_type='column', value=names[i], expression='',
+                                      tgt_field_type='text', is_hub_field=False),
+        HubMartField: lambda cls, i: cls(hub_table='hub_bench', rk_field=names[i], business_key_schema='bk_bench',
+                                         on_full_null='new_rk', src_attribute=names[i], src_type='bigint',
+                                         field_type='bigint', is_bk=False, schema='rdv_bench', expression='',
+                                         mart_retain_key=names[i]),
+    }
+
+
+def run_benchmark(count: int) -> dict:
+    # Имена полей одинаковой длины, что-бы при вычислении производных строк объем памяти не зависел от номера объекта
+    names = [f'attr_{i:08d}' for i in range(count)]
+
+    result = dict()
+    for cls, factory in _factories(names).items():
+        dict_cls = _dict_class(cls)
+        slots_size = _bytes_per_object(lambda i: factory(cls, i), count)
+        dict_size = _bytes_per_object(lambda i: factory(dict_cls, i), count)
+        result[cls.__name__] = {
+            'slots': slots_size,
+            'dict': dict_size,
+            'saved_percent': round(100 * (dict_size - slots_size) / dict_size, 1) if dict_size else None,
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Объем памяти, занимаемый описаниями полей")
+    parser.add_argument("--count", type=int, default=50000, help="Количество объектов каждого класса")
+    args = parser.parse_args()
+
+    print(json.dumps({'count': args.count, 'bytes_per_object': run_benchmark(args.count)},
+                     ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Измерение производительности генератора по этапам обработки:
+ * excel_parse - чтение книги EXCEL (MappingMeta);
+ * validation - проверка маппинга (MappingValidation);
+ * flow_context - формирование описаний потоков (FlowContext);
+ * export - формирование и запись файлов потоков (ExportData).
+
+Для каждого этапа выводится время выполнения, пиковый объем занимаемой процессом памяти (RSS) и количество
+обработанных строк листа 'Детали загрузок Src-RDV' в секунду. Результат выводится в формате JSON,
+что-бы его можно было сравнить с результатами других версий программы.
+
+Пример запуска из каталога программы:
+    python -m benchmark.run_benchmark -c generator.yaml --flows 100 --json result.json
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+
+import pandas as pd
+
+from benchmark.synthetic_mapping import FLOW_NAME_PATTERN, create_mapping
+from core.config import Config
+from core.diagnostics import Diagnostics
+from core.exportdata import ExportData
+from core.map_gen import build_flow_context
+from core.mapping import MappingMeta
+from core.validation import MappingValidation
+
+
+def _reset_peak_rss() -> bool:
+    """
+    Сбрасывает пиковый объем памяти процесса (linux). Возвращает False, если сброс не поддерживается
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss() -> int:
+    """
+    Пиковый объем памяти процесса в байтах
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss в linux задается в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageResults:
+    """
+    Результаты измерений по этапам
+    """
+
+    def __init__(self):
+        self.stages: dict[str, dict] = dict()
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0):
+        """
+        Измеряет время выполнения и пиковый объем памяти этапа.
+        Количество обработанных строк можно задать после выполнения этапа в поле rows возвращаемого словаря.
+        """
+        result: dict = {'rows': rows}
+        peak_reset = _reset_peak_rss()
+        start = time.perf_counter()
+        yield result
+        wall_time = time.perf_counter() - start
+
+        self.stages[name] = {
+            'wall_time': round(wall_time, 4),
+            'peak_rss': _peak_rss(),
+            'peak_rss_reset': peak_reset,
+            'rows': result['rows'],
+            'rows_per_sec': round(result['rows'] / wall_time, 1) if wall_time > 0 else None,
+        }
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=10,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_benchmark(file_path: str, out_path: str) -> dict:
+    """
+    Выполняет этапы обработки файла маппинга и возвращает результаты измерений
+    """
+    results = StageResults()
+
+    with open(file_path, 'rb') as f:
+        file_data = f.read()
+
+    diagnostics = Diagnostics()
+
+    # Данные маппинга считываются из EXCEL, сохраненная копия не используется
+    with results.stage('excel_parse') as stage:
+        mapping_meta = MappingMeta(io.BytesIO(file_data), diagnostics, use_cache=False)
+        stage['rows'] = rows = len(mapping_meta.mapping_df)
+
+    with results.stage('validation', rows=rows):
+        validation = MappingValidation(mapping_meta)
+
+    flow_list = mapping_meta.mapping_list['flow_name'].unique()
+    flow_contexts = []
+    with results.stage('flow_context', rows=rows):
+        for wrk_index, flow_name in enumerate(flow_list):
+            flow_context = build_flow_context(wrk_index=wrk_index, flow_name=flow_name, mapping_meta=mapping_meta,
+                                              validation=validation, diagnostics=diagnostics)
+            if flow_context is not None:
+                flow_contexts.append(flow_context)
+
+    files = 0
+    with results.stage('export', rows=rows):
+        for flow_context in flow_contexts:
+            export_data = ExportData(templates_path=Config.templates_path,
+                                     path=os.path.join(out_path, flow_context.flow_name), flow_context=flow_context)
+            export_data.generate_files()
+            files += export_data.writer.created + export_data.writer.changed + export_data.writer.unchanged
+
+    return {
+        'mapping': os.path.abspath(file_path),
+        'mapping_size': len(file_data),
+        'flows': len(flow_list),
+        'flows_generated': len(flow_contexts),
+        'rows': rows,
+        'files': files,
+        'errors': diagnostics.error_count,
+        'warnings': diagnostics.warning_count,
+        'wall_time': round(sum(stage['wall_time'] for stage in results.stages.values()), 4),
+        'peak_rss': _peak_rss(),
+        'stages': results.stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Измерение производительности генератора")
+    parser.add_argument("-c", "--config", default="generator.yaml", help="Файл конфигурации программы")
+    parser.add_argument("-m", "--mapping", default=None,
+                        help="EXCEL-файл маппинга. Если не указан, то формируется синтетический файл маппинга")
+    parser.add_argument("--flows", type=int, default=50, help="Количество потоков синтетического маппинга")
+    parser.add_argument("--tables", type=int, default=2, help="Количество целевых таблиц в потоке")
+    parser.add_argument("--attrs", type=int, default=20, help="Количество полей целевой таблицы")
+    parser.add_argument("--hub-ratio", type=float, default=0.1, help="Доля полей, которые ссылаются на хаб")
+    parser.add_argument("--hubs", type=int, default=10, help="Количество различных хабов")
+    parser.add_argument("--json", default=None, help="Файл для записи результатов. По умолчанию - вывод на экран")
+    args = parser.parse_args()
+
+    # Файлы потоков и журнал формируются во временном каталоге
+    work_path = tempfile.mkdtemp(prefix='ceh-rdv-benchmark-')
+    try:
+        # Сообщения при чтении файла конфигурации не смешиваются с результатами
+        with redirect_stdout(sys.stderr):
+            Config.load_config(config_name=os.path.abspath(args.config), out_path=work_path)
+        logging.basicConfig(level=logging.INFO, filename=Config.log_file, filemode="w", encoding='utf-8',
+                            format="%(asctime)s %(levelname)s %(message)s")
+
+        # Настройки pandas совпадают с настройками программы
+        pd.options.mode.copy_on_write = True
+
+        file_path = args.mapping
+        params: dict = dict()
+        if file_path is None:
+            # Фильтр потоков из файла конфигурации не должен исключать потоки синтетического маппинга
+            Config.config['wf_templates_list'] = [FLOW_NAME_PATTERN]
+            file_path = os.path.join(work_path, 'mapping.xlsx')
+            params = {'flows': args.flows, 'tables': args.tables, 'attrs': args.attrs, 'hub_ratio': args.hub_ratio,
+                      'hubs': args.hubs}
+            create_mapping(file_path, flows=args.flows, tables=args.tables, attrs=args.attrs,
+                           hub_ratio=args.hub_ratio, hubs=args.hubs)
+
+        out_path = os.path.join(work_path, 'out')
+        os.makedirs(out_path)
+
+        result = {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'synthetic': params or None,
+        }
+        result.update(run_benchmark(file_path, out_path))
+        if params:
+            # Синтетический файл маппинга удаляется вместе с временным каталогом
+            result['mapping'] = None
+
+    finally:
+        logging.shutdown()
+        shutil.rmtree(work_path, ignore_errors=True)
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    # Если потоки не сформированы, то этапы flow_context и export ничего не измеряют
+    if result['flows_generated'] == 0 or result['errors'] > 0:
+        print(f"Внимание: сформировано потоков - {result['flows_generated']} из {result['flows']}, "
+              f"ошибок - {result['errors']}. Результаты измерений некорректны. Проверьте параметры regexp и "
+              f"wf_templates_list файла конфигурации", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Формирование синтетического файла маппинга заданного размера для измерения производительности генератора.
+Названия колонок листов берутся из секции excel_data_definition файла конфигурации.
+"""
+import argparse
+
+import openpyxl
+import yaml
+
+from core.config import Config
+
+LIST_SHEET: str = 'Перечень загрузок Src-RDV'
+DETAILS_SHEET: str = 'Детали загрузок Src-RDV'
+
+# Код источника для поля src_cd
+SRC_CD: str = 'BNCH'
+# Шаблон имен потоков синтетического маппинга (для параметра wf_templates_list)
+FLOW_NAME_PATTERN: str = '^wf_bench_'
+# Типы полей источника и соответствующие им типы полей целевой таблицы
+_ATTR_TYPES: list[tuple[str, str]] = [('string', 'text'), ('bigint', 'bigint'), ('date', 'date'),
+                                      ('numeric', 'decimal')]
+# Технические поля целевой таблицы: (имя_поля, тип)
+_TECH_FIELDS: list[tuple[str, str]] = [('effective_dttm', 'timestamp'), ('hash_diff', 'char(32)'),
+                                       ('version_id', 'bigint'), ('deleted_flg', 'boolean'),
+                                       ('valid_flg', 'boolean'), ('invalid_id', 'bigint')]
+
+
+def _sheet_columns(sheet_name: str) -> list[str]:
+    return Config.excel_data_definition['columns'][sheet_name]
+
+
+def _append_row(worksheet, columns: list[str], values: dict) -> None:
+    worksheet.append([values.get(col_name.lower()) for col_name in columns])
+
+
+def create_mapping(file_name: str, flows: int = 10, tables: int = 2, attrs: int = 20, hub_ratio: float = 0.1,
+                   hubs: int = 10) -> int:
+    """
+    Формирует книгу EXCEL с листами 'Перечень загрузок Src-RDV' и 'Детали загрузок Src-RDV'.
+
+    Args:
+        file_name: Имя файла
+        flows: Количество потоков
+        tables: Количество целевых таблиц в потоке
+        attrs: Количество полей целевой таблицы (без технических полей)
+        hub_ratio: Доля полей целевой таблицы, которые ссылаются на хаб
+        hubs: Количество различных хабов. Поля одной таблицы ссылаются на разные хабы, поэтому количество хабов
+            увеличивается до количества полей таблицы, которые ссылаются на хаб
+
+    Returns: Количество строк на листе 'Детали загрузок Src-RDV'
+    """
+    list_columns = _sheet_columns(LIST_SHEET)
+    details_columns = _sheet_columns(DETAILS_SHEET)
+
+    workbook = openpyxl.Workbook(write_only=True)
+    list_sheet = workbook.create_sheet(LIST_SHEET)
+    details_sheet = workbook.create_sheet(DETAILS_SHEET)
+
+    # Первая строка - названия колонок на русском языке, вторая - названия колонок, которые обрабатывает программа
+    for worksheet, columns in [(list_sheet, list_columns), (details_sheet, details_columns)]:
+        worksheet.append(['-'] * len(columns))
+        worksheet.append(columns)
+
+    hub_attrs = round(attrs * hub_ratio)
+    hubs = max(hubs, hub_attrs)
+    details_rows = 0
+    uid = 0
+    for flow in range(flows):
+        flow_name = f'wf_bench_{flow:05d}'
+        for table in range(tables):
+            uid += 1
+            algorithm_uid = f'B{uid:07d}'
+            tgt_table = f'rdv_bench.mart_{flow:05d}_{table}'
+            src_table = f'src_bench.tbl_{flow:05d}_{table}'
+
+            _append_row(list_sheet, list_columns, {
+                'algorithm_uid': algorithm_uid, 'subalgorithm_uid': 1, 'version': '1', 'flow_name': flow_name,
+                'tgt_table': tgt_table, 'target_rdv_object_type': 'MART', 'src_table': src_table,
+                'source_name': 'ODS', 'scd_type': 'scd2', 'algo_name': f'Загрузка {tgt_table}',
+                'distribution_field': 'id', 'comment': f'Таблица {tgt_table}'})
+
+            rows: list[dict] = [{'expression': f"'{SRC_CD}'", 'tgt_attribute': 'src_cd', 'tgt_attr_datatype': 'text',
+                                 'tgt_attr_mandatory': 'not null'}]
+            rows += [{'tgt_attribute': name, 'tgt_attr_datatype': data_type, 'tgt_attr_mandatory': 'not null'}
+                     for name, data_type in _TECH_FIELDS]
+            rows.append({'src_table': src_table, 'src_attribute': 'id', 'src_attr_datatype': 'string', 'src_pk': 'pk',
+                         'tgt_pk': 'pk', 'tgt_attribute': 'id', 'tgt_attr_datatype': 'text',
+                         'tgt_attr_mandatory': 'not null'})
+
+            for attr in range(attrs):
+                src_type, tgt_type = _ATTR_TYPES[attr % len(_ATTR_TYPES)]
+                row = {'src_table': src_table, 'src_attribute': f'attr_{attr}', 'src_attr_datatype': src_type,
+                       'comment': f'Поле {attr}', 'tgt_attribute': f'attr_{attr}', 'tgt_attr_datatype': tgt_type,
+                       'tgt_attr_mandatory': 'null'}
+                if attr < hub_attrs:
+                    hub = (flow + attr) % hubs
+                    row.update({'src_attr_datatype': 'string', 'tgt_attribute': f'hub_{hub}_rk',
+                                'tgt_attr_datatype': 'bigint', 'attr:conversion_type': 'hub',
+                                'attr:bk_schema': f'bk_bench_{hub}', 'attr:bk_object': f'rdv_bench.hub_{hub}',
+                                'attr_nulldefault': 'new_rk'})
+                rows.append(row)
+
+            for row in rows:
+                row.update({'algorithm_uid': algorithm_uid, 'subalgorithm_uid': 1, 'tgt_table': tgt_table})
+                _append_row(details_sheet, details_columns, row)
+            details_rows += len(rows)
+
+    workbook.save(file_name)
+    return details_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Формирование синтетического файла маппинга")
+    parser.add_argument("-c", "--config", default="generator.yaml", help="Файл конфигурации программы")
+    parser.add_argument("-o", "--out", required=True, help="Имя формируемого EXCEL-файла")
+    parser.add_argument("--flows", type=int, default=10, help="Количество потоков")
+    parser.add_argument("--tables", type=int, default=2, help="Количество целевых таблиц в потоке")
+    parser.add_argument("--attrs", type=int, default=20, help="Количество полей целевой таблицы")
+    parser.add_argument("--hub-ratio", type=float, default=0.1, help="Доля полей, которые ссылаются на хаб")
+    parser.add_argument("--hubs", type=int, default=10, help="Количество различных хабов")
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        Config.config = yaml.safe_load(f)
+    Config.excel_data_definition = Config.config.get('excel_data_definition', dict())
+
+    rows = create_mapping(args.out, flows=args.flows, tables=args.tables, attrs=args.attrs, hub_ratio=args.hub_ratio,
+                          hubs=args.hubs)
+    print(f'{args.out}: строк на листе "{DETAILS_SHEET}" - {rows}')
+
+
+if __name__ == "__main__":
+    main()
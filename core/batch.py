@@ -0,0 +1,74 @@
+import logging
+
+from jinja2 import TemplateNotFound
+
+import core.exceptions as exp
+from core.map_gen import mapping_generator
+from core.staging import STAGING_NONE
+
+# Коды завершения программы в пакетном режиме
+EXIT_OK: int = 0
+EXIT_WARNING: int = 1
+EXIT_ERROR: int = 2
+
+
+def run_batch(file_path: str, out_path: str, validate_only: bool = False, jobs: int = 1, force: bool = False,
+              staging: str = STAGING_NONE, write_threads: int = 0, use_cache: bool = True,
+              trace_memory: bool = False) -> int:
+    """
+    Формирование файлов потоков без графического интерфейса (пакетный режим).
+    Повторяет логику обработки результата из диалога программы, но вместо сообщений возвращает код завершения.
+
+    Args:
+        file_path: Полный путь к файлу маппинга RDV
+        out_path: Каталог, в котором будут сформированы подкаталоги с описанием потоков
+        validate_only: Только проверка маппинга, файлы потоков не формируются
+        jobs: Количество процессов для формирования потоков
+        force: Формировать все потоки, в том числе не изменившиеся с предыдущего запуска
+        staging: Режим публикации файлов потоков: STAGING_NONE, STAGING_FLOW или STAGING_RUN
+        write_threads: Количество потоков (threads) для записи файлов
+        use_cache: Загружать данные маппинга из кэша, если книга EXCEL не изменилась
+        trace_memory: Измерять объем памяти этапов обработки, потоков и шаблонов
+
+    Returns: Код завершения: EXIT_OK, EXIT_WARNING или EXIT_ERROR
+    """
+
+    if not file_path:
+        msg = "EXCEL-файл с описанием данных не определен"
+        logging.error(msg)
+        print(f"Ошибка: {msg}")
+        return EXIT_ERROR
+
+    try:
+        diagnostics = mapping_generator(file_path=file_path, out_path=out_path, validate_only=validate_only,
+                                        jobs=jobs, force=force, staging=staging, write_threads=write_threads,
+                                        use_cache=use_cache, trace_memory=trace_memory)
+
+    except (exp.IncorrectMappingException, ValueError) as err:
+        logging.error(err)
+        print(f"Ошибка: {err}. Проверьте журнал работы программы.")
+        return EXIT_ERROR
+
+    except TemplateNotFound:
+        logging.exception("Ошибка чтения шаблона")
+        print("Ошибка чтения шаблона. Проверьте журнал работы программы.")
+        return EXIT_ERROR
+
+    except Exception as err:
+        logging.exception("Обработка данных завершилась из-за необрабатываемой ошибки")
+        print(f"Unexpected {err=}, {type(err)=}")
+        return EXIT_ERROR
+
+    if diagnostics.is_error:
+        logging.info("Обработка завершена с ошибками")
+        print("Во время обработки были ошибки. Прочитайте описание ошибок (error) в журнале работы программы!")
+        return EXIT_ERROR
+
+    if diagnostics.is_warning:
+        logging.info("Обработка завершена с предупреждениями")
+        print("Обработка завершена c предупреждениями. Прочитайте предупреждения (warning) в журнале работы программы.")
+        return EXIT_WARNING
+
+    logging.info('Обработка завершена без ошибок')
+    print("Обработка завершена без ошибок.")
+    return EXIT_OK
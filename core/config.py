@@ -1,10 +1,13 @@
 import logging
 import os
+import re
 
 import yaml
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, Template, TemplateSyntaxError
 
 from core.exceptions import IncorrectConfigException
+from core import mapping_cache
+from core.template_set import TemplateSet, create_environment
 
 
 class Config:
@@ -21,6 +24,8 @@ class Config:
     excel_data_definition: dict
     setting_up_field_lists: dict
     out_path: str
+    # Скомпилированные регулярные выражения из раздела regexp: {имя: шаблон}
+    regexp_patterns: dict[str, re.Pattern]
 
     log_file: str
     log_level: str
@@ -30,12 +35,18 @@ class Config:
     author: str
     data_capture_mode: str
     delta_mode: str
-    env: any
+    env: Environment
+    template_set: TemplateSet
+    # Скомпилированные шаблоны из параметров файла конфигурации: {имя_параметра: шаблон}
+    string_templates: dict[str, Template]
     templates_path: str
+    template_cache_path: str | None
+    # Проверять изменение файлов шаблонов при каждом использовании (режим диалога)
+    template_auto_reload: bool = False
+    mapping_cache_path: str
+    mapping_cache_size: int
     excel_file: str
     config_file: str
-    is_warning: bool = False
-    is_error: bool = False
     colorlog: bool = False
 
     # Версия структуры yaml-файлов wf - потока (WorkFlow).
@@ -43,11 +54,12 @@ class Config:
     work_flow_schema_version: str = "1.18"
 
     @staticmethod
-    def load_config(config_name: str):
+    def load_config(config_name: str, out_path: str | None = None):
         """
         Выполняет считывание и обработку указанного в параметре конфигурационного файла.
         Args:
             config_name: Полное имя, с указанием каталога, конфигурационного файла программы
+            out_path: Каталог для формирования потоков. Если задан, то заменяет параметр out_path файла конфигурации
 
         Returns: None
 
@@ -65,6 +77,9 @@ class Config:
         Config.tags = Config.config.get('tags', dict())
         Config.resource_tags = Config.config.get('resource_tags', dict())
 
+        # Регулярные выражения проверяются и компилируются один раз при чтении файла конфигурации
+        Config.compile_regexps()
+
         Config.setting_up_field_lists = Config.config.get('setting_up_field_lists', dict())
         Config.field_type_list = Config.config.get('field_type_list', dict())
         Config.excel_data_definition = Config.config.get('excel_data_definition', dict())
@@ -85,10 +100,18 @@ class Config:
             print(msg)
             raise FileExistsError(msg)
 
-        Config.env = Environment(loader=FileSystemLoader(Config.templates_path))
+        # Каталог для скомпилированных шаблонов. Не задан - каталог Jinja "по умолчанию",
+        # пустое значение - скомпилированные шаблоны не сохраняются
+        Config.template_cache_path = Config.config.get('template_cache_path')
+        Config.init_templates()
+
+        # Каталог для данных маппинга, считанных из EXCEL. Пустое значение - данные не сохраняются
+        Config.mapping_cache_path = Config.config.get('mapping_cache_path', mapping_cache.default_cache_path())
+        Config.mapping_cache_size = Config.config.get('mapping_cache_size', mapping_cache.DEFAULT_CACHE_SIZE)
 
         # Каталог для формирования подкаталогов с файлами потоков
-        out_path: str = Config.config.get('out_path', '')
+        if out_path is None:
+            out_path = Config.config.get('out_path', '')
         out_path = out_path.strip()
         out_path = 'AFlows' if not out_path else out_path
         out_path = os.path.abspath(out_path) if not os.path.isabs(out_path) else out_path
@@ -118,6 +141,71 @@ class Config:
 
         print(Config.log_viewer)
 
+    @staticmethod
+    def init_templates():
+        """
+        Загружает и компилирует шаблоны из каталога templates_path.
+        """
+        Config.env = create_environment(templates_path=Config.templates_path, cache_path=Config.template_cache_path,
+                                        auto_reload=Config.template_auto_reload)
+        Config.template_set = TemplateSet(Config.env)
+
+        # Параметры файла конфигурации, которые являются шаблонами: имя оканчивается на "_template"
+        # (например, uni_resource_template)
+        Config.string_templates = dict()
+        for name, value in Config.config.items():
+            if not (name.endswith('_template') and isinstance(value, str)):
+                continue
+            try:
+                Config.string_templates[name] = Config.env.from_string(value)
+            except TemplateSyntaxError as err:
+                msg = f'Ошибка в шаблоне "{name}" файла конфигурации: {err}'
+                print(msg)
+                raise IncorrectConfigException(msg)
+
+    @staticmethod
+    def get_string_template(name: str) -> Template | None:
+        """
+        Возвращает скомпилированный шаблон из параметра файла конфигурации.
+        Если параметр не задан или не является шаблоном, то возвращается None.
+        Args:
+            name: Имя параметра
+        """
+        return Config.string_templates.get(name)
+
+    @staticmethod
+    def compile_regexps():
+        """
+        Компилирует регулярные выражения из раздела regexp файла конфигурации.
+        При ошибке в регулярном выражении возбуждается исключение IncorrectConfigException.
+        """
+        Config.regexp_patterns = dict()
+        for name, pattern in (Config.config.get('regexp') or dict()).items():
+            try:
+                Config.regexp_patterns[name] = re.compile(pattern)
+            except (re.error, TypeError) as err:
+                msg = f'Ошибка в регулярном выражении "{name}" файла конфигурации: {err}'
+                print(msg)
+                raise IncorrectConfigException(msg)
+
+    @staticmethod
+    def get_pattern(name: str, default: str | None = None) -> re.Pattern:
+        """
+        Возвращает скомпилированное регулярное выражение, которое зарегистрировано в конфигурационном файле
+        под указанным именем. Текст выражения доступен в атрибуте pattern.
+        В случае отсутствия указанного имени и значения по умолчанию возбуждается исключение IncorrectConfigException.
+        Args:
+            name: Имя регулярного выражения.
+            default: Регулярное выражение "по умолчанию"
+        """
+        pattern = Config.regexp_patterns.get(name)
+        if pattern is not None:
+            return pattern
+
+        pattern = re.compile(Config.get_regexp(name, default=default))
+        Config.regexp_patterns[name] = pattern
+        return pattern
+
     @staticmethod
     def get_regexp(name: str, default=None) -> str:
         """
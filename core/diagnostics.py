@@ -0,0 +1,101 @@
+import logging
+
+import pandas as pd
+from pandas import DataFrame
+
+SEVERITY_WARNING: str = 'warning'
+SEVERITY_ERROR: str = 'error'
+
+_LOG_LEVELS: dict = {SEVERITY_WARNING: logging.WARNING, SEVERITY_ERROR: logging.ERROR}
+
+
+class Diagnostics:
+    """
+    Ошибки и предупреждения одного запуска генератора с привязкой к потоку, таблице и строке EXCEL.
+    Создается на каждый запуск и передается в MappingMeta, FlowContext и ExportData вместо глобальных признаков.
+    Сообщения хранятся в виде шаблона и аргументов и форматируются только при выводе в журнал или в to_frame.
+    """
+
+    COLUMNS: list[str] = ['severity', 'flow', 'table', 'excel_row_num', 'message']
+
+    def __init__(self):
+        # (severity, flow, table, excel_row_num, message, args)
+        self._items: list[tuple] = []
+        self.error_count: int = 0
+        self.warning_count: int = 0
+
+    @property
+    def is_error(self) -> bool:
+        return self.error_count > 0
+
+    @property
+    def is_warning(self) -> bool:
+        return self.warning_count > 0
+
+    def add(self, severity: str, message: str, *args, flow: str | None = None, table: str | None = None,
+            excel_row_num: int | None = None, log: bool = True) -> None:
+        """
+        Регистрирует ошибку/предупреждение.
+
+        Args:
+            severity: SEVERITY_ERROR или SEVERITY_WARNING
+            message: Текст сообщения. Может содержать шаблоны %s, которые заполняются из args
+            flow: Имя потока
+            table: Имя таблицы
+            excel_row_num: Номер строки EXCEL
+            log: Выводить сообщение в журнал
+        """
+        if severity == SEVERITY_ERROR:
+            self.error_count += 1
+        else:
+            self.warning_count += 1
+
+        self._items.append((severity, flow, table, excel_row_num, message, args))
+
+        if log:
+            logging.log(_LOG_LEVELS[severity], message, *args)
+
+    def error(self, message: str, *args, flow: str | None = None, table: str | None = None,
+              excel_row_num: int | None = None, log: bool = True) -> None:
+        self.add(SEVERITY_ERROR, message, *args, flow=flow, table=table, excel_row_num=excel_row_num, log=log)
+
+    def warning(self, message: str, *args, flow: str | None = None, table: str | None = None,
+                excel_row_num: int | None = None, log: bool = True) -> None:
+        self.add(SEVERITY_WARNING, message, *args, flow=flow, table=table, excel_row_num=excel_row_num, log=log)
+
+    def add_rows(self, severity: str, message: str, rows: DataFrame, flow: str | None = None) -> None:
+        """
+        Регистрирует ошибку для каждой строки маппинга без вывода в журнал.
+        Таблица и номер строки EXCEL берутся из колонок tgt_table и excel_row_num.
+        """
+        tables = rows['tgt_table'] if 'tgt_table' in rows.columns else [None] * len(rows)
+        row_nums = rows['excel_row_num'] if 'excel_row_num' in rows.columns else [None] * len(rows)
+        self._items.extend((severity, flow, table, row_num, message, ())
+                           for table, row_num in zip(tables, row_nums))
+
+        if severity == SEVERITY_ERROR:
+            self.error_count += len(rows)
+        else:
+            self.warning_count += len(rows)
+
+    def error_flows(self) -> set[str]:
+        """
+        Возвращает имена потоков, для которых зарегистрированы ошибки
+        """
+        return {flow for severity, flow, *_ in self._items if severity == SEVERITY_ERROR and flow is not None}
+
+    def merge(self, other: 'Diagnostics') -> None:
+        """
+        Добавляет ошибки/предупреждения другого запуска (например, сформированные в отдельном процессе)
+        """
+        self._items.extend(other._items)
+        self.error_count += other.error_count
+        self.warning_count += other.warning_count
+
+    def to_frame(self) -> DataFrame:
+        """
+        Возвращает все зарегистрированные ошибки/предупреждения
+        """
+        return pd.DataFrame([(severity, flow, table, excel_row_num, message % args if args else message)
+                             for severity, flow, table, excel_row_num, message, args in self._items],
+                            columns=self.COLUMNS)
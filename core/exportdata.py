@@ -1,178 +1,209 @@
 import logging
 import os
-from jinja2 import Environment, FileSystemLoader
+from concurrent.futures import ThreadPoolExecutor
+
+from jinja2 import Template
+
 from core.config import Config
+from core.file_writer import FileWriter
+from core.run_metrics import SPAN_TEMPLATE
 
 
 class ExportData:
 
-    def __init__(self, templates_path: str, path: str, flow_context):
+    def __init__(self, templates_path: str, path: str, flow_context, live_path: str | None = None,
+                 write_executor: ThreadPoolExecutor | None = None):
+        """
+        Args:
+            templates_path: Каталог шаблонов
+            path: Каталог, в который записываются файлы потока
+            flow_context: Описание потока
+            live_path: Каталог потока, если файлы подготавливаются во временном каталоге path
+            write_executor: Пул потоков для записи файлов. Если не задан, то файлы записываются сразу
+        """
         self.path = path
 
         self.templates_path = templates_path
         self.flow_context = flow_context
-        # self.env_context = Environment(loader=FileSystemLoader(Config.templates_path))
-        self.env_context = Config.env
-
-        self.templates_list = self.env_context.list_templates()
+        # Шаблоны загружаются и компилируются один раз за время работы программы
+        self.template_set = Config.template_set
+
+        # Ошибки записи файлов регистрируются в диагностике потока
+        self.diagnostics = flow_context.diagnostics
+        # Время формирования файлов по шаблонам
+        self.run_metrics = flow_context.run_metrics
+
+        # Файлы, содержимое которых не изменилось, не перезаписываются
+        self.writer = FileWriter(path=path, live_path=live_path, executor=write_executor)
+
+    def _write_file(self, file_path: str, output: str):
+        """
+        Передает сформированный по шаблону текст на запись в файл.
+        Ошибка записи не прерывает формирование остальных файлов потока.
+        """
+        self.writer.write(file_path, output)
+
+    def _render(self, template: Template, **kwargs) -> str:
+        """
+        Формирует текст по шаблону, измеряя время формирования
+        """
+        with self.run_metrics.span(SPAN_TEMPLATE, template.name):
+            return template.render(**kwargs)
 
     def generate_files(self):
+        try:
+            self._generate_files()
+        finally:
+            # Ожидаем запись всех файлов потока
+            self.writer.flush()
+
+        writer = self.writer
+        self.run_metrics.count_files(written=writer.created + writer.changed, unchanged=writer.unchanged,
+                                     bytes_written=writer.bytes_written)
+
+        for file_path, err in self.writer.errors:
+            self.diagnostics.error('Ошибка записи файла "%s": %s', file_path, err, flow=self.flow_context.flow_name)
+
+    def _generate_files(self):
 
         # Файл потока wf_*.yaml ----------------------------------------------------------------------------------------
-        exp_path = os.path.join(self.path, r"ceh-etl\general_ledger\src_rdv\schema\work_flows")
+        exp_path = os.path.join(self.path, "ceh-etl", "general_ledger", "src_rdv", "schema", "work_flows")
         file_path = os.path.join(exp_path, self.flow_context.flow_name + '.yaml')
         os.makedirs(exp_path, exist_ok=True)
-        template = self.env_context.get_template('flow.wk.yaml')
-        output = template.render(ctx=self.flow_context)
+        template = self.template_set.get('flow.wk.yaml')
+        output = self._render(template, ctx=self.flow_context)
 
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(output)
+        self._write_file(file_path, output)
 
         # py - файл потока управления cf_*.yaml ------------------------------------------------------------------------
-        exp_path = os.path.join(self.path, r"ceh-etl\general_ledger\src_rdv\flow_dumps")
+        exp_path = os.path.join(self.path, "ceh-etl", "general_ledger", "src_rdv", "flow_dumps")
         file_path = os.path.join(exp_path, "cf_" + self.flow_context.base_flow_name + '.yaml')
         os.makedirs(exp_path, exist_ok=True)
-        template = self.env_context.get_template('flow.cf.yaml')
-        output = template.render(ctx=self.flow_context)
+        template = self.template_set.get('flow.cf.yaml')
+        output = self._render(template, ctx=self.flow_context)
 
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(output)
+        self._write_file(file_path, output)
 
 
         # py - файл рабочего потока (wf_*.py) --------------------------------------------------------------------------
-        exp_path = os.path.join(self.path, r"ceh-etl\general_ledger\src_rdv\dags")
+        exp_path = os.path.join(self.path, "ceh-etl", "general_ledger", "src_rdv", "dags")
         file_path = os.path.join(exp_path, self.flow_context.flow_name + '.py')
         os.makedirs(exp_path, exist_ok=True)
-        template = self.env_context.get_template('flow_wk.py')
-        output = template.render(ctx=self.flow_context)
+        template = self.template_set.get('flow_wk.py')
+        output = self._render(template, ctx=self.flow_context)
 
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(output)
+        self._write_file(file_path, output)
 
 
         # uni - ресурсы (*.json) ---------------------------------------------------------------------------------------
         for uni in self.flow_context.sources:
-            exp_path = os.path.join(self.path, r"ceh-etl\_resources\uni", uni.system.lower(), uni.schema)
+            exp_path = os.path.join(self.path, "ceh-etl", "_resources", "uni", uni.system.lower(), uni.schema)
             os.makedirs(exp_path, exist_ok=True)
             file_path = os.path.join(exp_path, uni.file_name)
 
             # Шаблоны для разных схем могут быть разными
-            template_name = f'resource.uni.table.{uni.schema.upper()}.json'
-            if template_name not in self.templates_list:
-                template_name = 'resource.uni.table.json'
+            template_name, template = self.template_set.uni_table(uni.schema)
 
             logging.debug(f'Для uni-ресурса "{uni.uni_res}" использован шаблон "{template_name}"')
-            
-            template = self.env_context.get_template(template_name)
-            output = template.render(ctx=self.flow_context, uni=uni, tags=self.flow_context.resource_tags)
+            output = self._render(template, ctx=self.flow_context, uni=uni, tags=self.flow_context.resource_tags)
 
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(output)
+            self._write_file(file_path, output)
 
 
         # Скрипт создания mart-таблиц ----------------------------------------------------------------------------------
-        exp_path = os.path.join(self.path, r"ceh-ddl\extensions\ripper\.data")
+        exp_path = os.path.join(self.path, "ceh-ddl", "extensions", "ripper", ".data")
         os.makedirs(exp_path, exist_ok=True)
         for target_table in self.flow_context.target_tables:
             if target_table.table_type == 'MART':
                 file_path = os.path.join(exp_path, target_table.file_name + '.sql')
-                template = self.env_context.get_template('create.table.mart.sql')
-                output = template.render(ctx=self.flow_context, tgt=target_table)
+                template = self.template_set.get('create.table.mart.sql')
+                output = self._render(template, ctx=self.flow_context, tgt=target_table)
 
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write(output)
+                self._write_file(file_path, output)
 
 
         # Файл описания mart-таблицы -----------------------------------------------------------------------------------
-        exp_path = os.path.join(self.path, r"ceh-etl\general_ledger\src_rdv\schema\ceh\rdv")
+        exp_path = os.path.join(self.path, "ceh-etl", "general_ledger", "src_rdv", "schema", "ceh", "rdv")
         os.makedirs(exp_path, exist_ok=True)
-        template = self.env_context.get_template('table.mart.yaml')
+        template = self.template_set.get('table.mart.yaml')
         for target_table in self.flow_context.target_tables:
             if target_table.table_type == 'MART':
                 file_path = os.path.join(exp_path, target_table.table_name + '.yaml')
-                output = template.render(ctx=self.flow_context, tgt=target_table)
+                output = self._render(template, ctx=self.flow_context, tgt=target_table)
 
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write(output)
+                self._write_file(file_path, output)
 
 
         # Ресурсы целевых mart-таблицы ---------------------------------------------------------------------------------
-        exp_path = os.path.join(self.path, r"ceh-etl\_resources\ceh\rdv")
+        exp_path = os.path.join(self.path, "ceh-etl", "_resources", "ceh", "rdv")
         os.makedirs(exp_path, exist_ok=True)
-        template = self.env_context.get_template('resource.ceh.mart.json')
+        template = self.template_set.get('resource.ceh.mart.json')
         for target_table in self.flow_context.target_tables:
             if target_table.table_type == 'MART':
                 file_path = os.path.join(exp_path, 'ceh.' + target_table.schema + '.' + target_table.table_name + '.json')
-                output = template.render(ctx=self.flow_context, tgt=target_table)
+                output = self._render(template, ctx=self.flow_context, tgt=target_table)
 
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(output)
+            self._write_file(file_path, output)
 
 
         # Необязательные скрипты создания hub - таблиц -----------------------------------------------------------------
-        exp_path = os.path.join(self.path, r"src\ceh-ddl\extensions\ripper\.data")
+        exp_path = os.path.join(self.path, "src", "ceh-ddl", "extensions", "ripper", ".data")
         os.makedirs(exp_path, exist_ok=True)
-        template = self.env_context.get_template('create.table.hub.sql')
+        template = self.template_set.get('create.table.hub.sql')
         for hub in self.flow_context.hubs:
             file_path = os.path.join(exp_path, hub.full_table_name + '.sql')
-            output = template.render(ctx=hub)
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(output)
+            output = self._render(template, ctx=hub)
+            self._write_file(file_path, output)
 
 
         # Необязательные файлы - Описание хаб - таблиц (hub_*.yaml) ----------------------------------------------------
-        exp_path = os.path.join(self.path, r"src\ceh-etl\general_ledger\src_rdv\schema\ceh\rdv")
+        exp_path = os.path.join(self.path, "src", "ceh-etl", "general_ledger", "src_rdv", "schema", "ceh", "rdv")
         os.makedirs(exp_path, exist_ok=True)
-        template = self.env_context.get_template('table.hub.yaml')
+        template = self.template_set.get('table.hub.yaml')
         for hub in self.flow_context.hubs:
             file_path = os.path.join(exp_path, hub.hub_name_only + '.yaml')
-            output = template.render(ctx=self.flow_context, hub=hub)
+            output = self._render(template, ctx=self.flow_context, hub=hub)
 
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(output)
+            self._write_file(file_path, output)
 
         # Ресурсы хабов. Помещаются в каталог src ----------------------------------------------------------------------
         # Формируются 2 одинаковых файла с разными именами
-        exp_path = os.path.join(self.path, r"src\ceh-etl\_resources\ceh\rdv")
+        exp_path = os.path.join(self.path, "src", "ceh-etl", "_resources", "ceh", "rdv")
         os.makedirs(exp_path, exist_ok=True)
-        template = self.env_context.get_template('resource.ceh.hub.bk_schema.json')
+        template = self.template_set.get('resource.ceh.hub.bk_schema.json')
         # template2 = self.env.get_template('resource.ceh.hub.json')
         for hub in self.flow_context.hubs:
 
             file_path = os.path.join(exp_path, 'ceh.' + hub.full_table_name + '.' + hub.business_key_schema + '.json')
-            output = template.render(ctx=hub, tags=self.flow_context.resource_tags)
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(output)
+            output = self._render(template, ctx=hub, tags=self.flow_context.resource_tags)
+            self._write_file(file_path, output)
 
             # Заготовка общего файла для всех "business_key_schema"
             file_path = os.path.join(exp_path, 'ceh.' + hub.full_table_name + '.json')
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(output)
+            self._write_file(file_path, output)
 
 
         # Скрипты формирования акцессоров для mart-таблиц --------------------------------------------------------------
-        exp_path = os.path.join(self.path, r"src")
+        exp_path = os.path.join(self.path, "src")
         os.makedirs(exp_path, exist_ok=True)
         for target_table in self.flow_context.target_tables:
             if target_table.table_type == 'MART':
                 file_path = os.path.join(exp_path, 'acc.' + target_table.file_name + '.sql')
-                template = self.env_context.get_template('f_gen_access_view.sql')
-                output = template.render(ctx=self.flow_context, tgt=target_table)
+                template = self.template_set.get('f_gen_access_view.sql')
+                output = self._render(template, ctx=self.flow_context, tgt=target_table)
 
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write(output)
+                self._write_file(file_path, output)
 
 
         # Описание внешних таблиц-источников ---------------------------------------------------------------------------
-        exp_path = os.path.join(self.path, r"ceh-etl\general_ledger\src_rdv\schema\db_tables")
+        exp_path = os.path.join(self.path, "ceh-etl", "general_ledger", "src_rdv", "schema", "db_tables")
         os.makedirs(exp_path, exist_ok=True)
         for src in self.flow_context.sources:
             file_path = os.path.join(exp_path, src.table + '.yaml')
-            template = self.env_context.get_template('db_table.yaml')
-            output = template.render(ctx=self.flow_context, src=src)
+            template = self.template_set.get('db_table.yaml')
+            output = self._render(template, ctx=self.flow_context, src=src)
 
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(output)
+            self._write_file(file_path, output)
 
 
 
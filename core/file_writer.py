@@ -0,0 +1,157 @@
+import hashlib
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+# Статусы записи файла
+FILE_CREATED: str = 'created'
+FILE_CHANGED: str = 'changed'
+FILE_UNCHANGED: str = 'unchanged'
+
+
+def _content_hash(data: bytes) -> bytes:
+    """
+    Хэш содержимого файла без строки-заголовка "Created ...".
+    Заголовок содержит время формирования файла и не учитывается при сравнении
+    """
+    first_line, sep, rest = data.partition(b'\n')
+    if b'Created' in first_line:
+        data = rest
+    return hashlib.sha256(data).digest()
+
+
+class FileWriter:
+    """
+    Записывает сформированные по шаблонам файлы. Файл перезаписывается, только если его содержимое изменилось.
+    Сначала сравнивается размер файла, затем хэш содержимого.
+    Ведет счетчики созданных, измененных и не изменившихся файлов.
+
+    При подготовке файлов во временном каталоге (path) сравнение выполняется с файлами каталога потока (live_path),
+    а не изменившиеся файлы переносятся в подготовленный каталог жесткой ссылкой (или копированием).
+
+    Если задан executor, то файлы записываются в отдельных потоках (threads), а формирование следующих файлов
+    по шаблонам продолжается. Количество ожидающих записи файлов ограничено queue_size: при заполнении очереди
+    write ожидает завершения записи ранее переданных файлов.
+    Ошибки записи (OSError) накапливаются в errors и не прерывают запись остальных файлов.
+    """
+
+    def __init__(self, path: str | None = None, live_path: str | None = None,
+                 executor: ThreadPoolExecutor | None = None, queue_size: int = 16):
+        """
+        Args:
+            path: Каталог, в который записываются файлы потока
+            live_path: Каталог потока, с файлами которого выполняется сравнение. Если не задан, то совпадает с path
+            executor: Пул потоков для записи файлов. Если не задан, то файлы записываются сразу
+            queue_size: Максимальное количество файлов, ожидающих записи
+        """
+        self.path = path
+        self.live_path = live_path if live_path != path else None
+
+        self.executor = executor
+        self._queue_slots = threading.BoundedSemaphore(queue_size)
+        self._pending: list[tuple[str, Future]] = []
+
+        self.created: int = 0
+        self.changed: int = 0
+        self.unchanged: int = 0
+        # Объем записанных данных
+        self.bytes_written: int = 0
+
+        # Ошибки записи: (имя_файла, исключение)
+        self.errors: list[tuple[str, OSError]] = []
+
+    def write(self, file_path: str, output: str) -> None:
+        """
+        Записывает текст в файл, если файл отсутствует или его содержимое отличается от output.
+        Переводы строк формируются так же, как при записи в текстовом режиме.
+
+        Args:
+            file_path: Полное имя файла
+            output: Текст файла
+        """
+        if self.executor is None:
+            try:
+                self._count(*self._write(file_path, output))
+            except OSError as err:
+                self.errors.append((file_path, err))
+            return
+
+        # Повторная запись того же файла выполняется после завершения предыдущей
+        for pending_path, pending_future in self._pending:
+            if pending_path == file_path:
+                wait([pending_future])
+
+        self._queue_slots.acquire()
+        try:
+            future = self.executor.submit(self._write, file_path, output)
+        except BaseException:
+            self._queue_slots.release()
+            raise
+        future.add_done_callback(lambda _: self._queue_slots.release())
+        self._pending.append((file_path, future))
+
+    def flush(self) -> None:
+        """
+        Ожидает завершения записи всех переданных файлов.
+        Ошибки записи добавляются в errors, прочие исключения передаются вызывающему коду.
+        """
+        pending, self._pending = self._pending, []
+        for file_path, future in pending:
+            try:
+                self._count(*future.result())
+            except OSError as err:
+                self.errors.append((file_path, err))
+
+    def _count(self, status: str, size: int) -> None:
+        self.bytes_written += size
+        if status == FILE_CREATED:
+            self.created += 1
+        elif status == FILE_CHANGED:
+            self.changed += 1
+        else:
+            self.unchanged += 1
+
+    def _write(self, file_path: str, output: str) -> tuple[str, int]:
+        """
+        Записывает файл. Возвращает статус записи (FILE_CREATED, FILE_CHANGED или FILE_UNCHANGED)
+        и количество записанных байт
+        """
+        data = output.replace('\n', os.linesep).encode('utf-8') if os.linesep != '\n' else output.encode('utf-8')
+
+        live_file_path = file_path
+        if self.live_path is not None:
+            live_file_path = os.path.join(self.live_path, os.path.relpath(file_path, self.path))
+
+        try:
+            size = os.path.getsize(live_file_path)
+        except FileNotFoundError:
+            size = None
+
+        if size is not None and size == len(data):
+            with open(live_file_path, 'rb') as f:
+                if _content_hash(f.read()) == _content_hash(data):
+                    if live_file_path != file_path:
+                        self._link(live_file_path, file_path)
+                    return FILE_UNCHANGED, 0
+
+        # Файл в подготовленном каталоге может быть жесткой ссылкой на файл каталога потока
+        if self.live_path is not None and os.path.exists(file_path):
+            os.remove(file_path)
+
+        with open(file_path, 'wb') as f:
+            f.write(data)
+
+        return (FILE_CREATED if size is None else FILE_CHANGED), len(data)
+
+    @staticmethod
+    def _link(src_path: str, dst_path: str) -> None:
+        """
+        Переносит не изменившийся файл в подготовленный каталог, сохраняя дату изменения файла
+        """
+        if os.path.exists(dst_path):
+            os.remove(dst_path)
+        try:
+            os.link(src_path, dst_path)
+        except OSError:
+            shutil.copy2(src_path, dst_path)
@@ -1,4 +1,4 @@
-import copy
+import hashlib
 import os
 import random
 import string
@@ -7,7 +7,9 @@ from datetime import datetime
 from pandas import Series
 
 from core.config import Config
+from core.diagnostics import Diagnostics
 from core.exceptions import IncorrectMappingException
+from core.run_metrics import RunMetrics
 
 
 def actual_date_name(src_cd: str)->str:
@@ -15,12 +17,14 @@ def actual_date_name(src_cd: str)->str:
 
 def create_short_name(name: str, short_name_len: int, random_str_len: int,
                       char_set: str = string.ascii_lowercase + string.digits,
-                      always_expand_name: bool = False):
+                      always_expand_name: bool = False, salt: str = ''):
     """
     Функция формирует "короткое имя" на основе значения в переменной name
     Если длина name меньше чем short_name_len, то ф-ия возвращает name без преобразования.
     Если длина name больше чем short_name_len, то name усекается до длинны (short_name_len - random_str_len) и
-    дополняется рандомной строкой до длинны short_name_len.
+    дополняется строкой до длинны short_name_len.
+    Строка вычисляется по хэшу name (параметр short_name_mode: hash, по умолчанию) или формируется случайно
+    (short_name_mode: random). В режиме hash для одного и того же name всегда формируется одно и то же имя.
     pattern=^[a-z][a-z0-9_]{2,22}$
     Args:
         name: Имя, на основе которого надо сформировать "короткое имя".
@@ -28,6 +32,7 @@ def create_short_name(name: str, short_name_len: int, random_str_len: int,
         random_str_len: Длина рандомной строки, которая используется для формирования "короткого имени".
         char_set: Набор символов, на основе которого формируется "рандомная" строка.
         always_expand_name: Если expand_name is True то короткое имя всегда формируется с использованием "рандомной" строки.
+        salt: Добавляется к name при вычислении хэша. Используется для разрешения коллизий имен
 
     Returns: Строка "Короткое имя"
     """
@@ -36,26 +41,67 @@ def create_short_name(name: str, short_name_len: int, random_str_len: int,
 
     if len(name) > short_name_len or always_expand_name:
         short_name = name[0:short_name_len - random_str_len]
-        short_name = (short_name + ''.join(random.choice(char_set) for _ in range(random_str_len)))
+        if Config.config.get('short_name_mode', 'hash') == 'random':
+            short_name = (short_name + ''.join(random.choice(char_set) for _ in range(random_str_len)))
+        else:
+            digest = hashlib.sha256((name + salt).encode('utf-8')).digest()
+            short_name = (short_name + ''.join(char_set[b % len(char_set)] for b in digest[:random_str_len]))
     else:
         short_name = name
 
     return short_name.lower()
 
 
+class ShortNameRegistry:
+    """
+    Реестр "коротких имен" потока.
+    Гарантирует уникальность short_name в пределах потока: при совпадении имен разных объектов
+    имя формируется заново с другим значением salt.
+    """
+
+    def __init__(self):
+        # short_name -> ключ объекта
+        self._owners: dict[str, str] = dict()
+        # ключ объекта -> short_name
+        self._names: dict[str, str] = dict()
+
+    def register(self, key: str, name: str, short_name: str, short_name_len: int = 22,
+                 random_str_len: int = 6) -> str:
+        """
+        Регистрирует "короткое имя" объекта.
+        Args:
+            key: Уникальный ключ объекта (например, resource_cd)
+            name: Имя, на основе которого сформировано "короткое имя"
+            short_name: "Короткое имя" объекта
+
+        Returns: Уникальное в пределах потока "короткое имя". Для одного ключа всегда возвращается одно и то же имя
+        """
+        if key in self._names:
+            return self._names[key]
+
+        salt = 0
+        while self._owners.get(short_name, key) != key:
+            salt += 1
+            short_name = create_short_name(name=name, short_name_len=short_name_len, random_str_len=random_str_len,
+                                           always_expand_name=True, salt=str(salt))
+
+        self._owners[short_name] = key
+        self._names[key] = short_name
+        return short_name
+
+
 # Класс TargetTable ----------------------------------------------------------------------------------------------------
 class DataBaseField:
+    # Объектов много (по одному на поле таблицы), поэтому атрибуты хранятся в слотах, а не в словаре
+    __slots__ = ('name', 'data_type', 'is_nullable', 'comment', 'is_pk', 'is_hub_field')
 
-    def __init__(self, name: str, data_type: str, comment:str, is_nullable: bool, is_pk, properties = None):
+    def __init__(self, name: str, data_type: str, comment:str, is_nullable: bool, is_pk, is_hub_field: bool = False):
         self.name = name
         self.data_type = data_type
         self.is_nullable = is_nullable
         self.comment = comment
-
-        if properties is None:
-            self.properties = dict()
-        else:
-            self.properties = properties
+        # Поле является ссылкой на hub
+        self.is_hub_field = is_hub_field
 
         if type(is_pk) is bool:
             self.is_pk = is_pk
@@ -64,6 +110,25 @@ class DataBaseField:
         else:
             self.is_pk = False
 
+
+class CehField:
+    """
+    Поле целевой таблицы для описания ресурса ceh с типом, замененным по списку ceh_datatype_aliases.
+    Остальные атрибуты берутся из исходного поля без копирования.
+    """
+    __slots__ = ('field', 'data_type')
+
+    def __init__(self, field: DataBaseField, data_type: str):
+        self.field = field
+        self.data_type = data_type
+
+    def __getattr__(self, name: str):
+        # Вызывается только для атрибутов, которые отсутствуют в CehField
+        if name == 'field':
+            raise AttributeError(name)
+        return getattr(self.field, name)
+
+
 class TargetTable:
 
     _ignore_primary_key = None
@@ -82,13 +147,14 @@ class TargetTable:
 
 
         self.fields: list[DataBaseField] = []
+        # Поля таблицы по имени в порядке добавления. При повторе имени сохраняется первое поле
+        self.fields_by_name: dict[str, DataBaseField] = dict()
         self.resource_ceh_fields = []
-        self.hash_fields = []
-        self.multi_fields = []
         self.hub_fields = []
 
-        self.distributed_by = ''
-        self.primary_key = ''
+        # Списки ключевых полей (primary_key, distributed_by, hash_fields, multi_fields).
+        # Формируются при первом обращении и сбрасываются при добавлении поля
+        self._key_lists: dict | None = None
 
         self.schema = schema
         self.table_name = table_name
@@ -99,40 +165,74 @@ class TargetTable:
 
         self.file_name = '.'.join([self.schema, self.table_name]).lower()
         self.distribution_field= distribution_field.lower()
-        self.distributed_by = self.distribution_field
 
         self.ceh_aliases: dict = Config.field_type_list.get('ceh_datatype_aliases', dict())
 
 
     def add_field(self, field: DataBaseField):
         self.fields.append(field)
+        self.fields_by_name.setdefault(field.name, field)
+        self._key_lists = None
 
         # Список полей для описания ресурса.
         # Допустимые типы полей в разных файлах потока - разные. :-()
-        ceh_field: DataBaseField = copy.deepcopy(field)
-        if field.data_type in self.ceh_aliases:
-            ceh_field: DataBaseField = copy.deepcopy(field)
-            ceh_field.data_type = self.ceh_aliases[field.data_type]
-
-        self.resource_ceh_fields.append(ceh_field)
-
-        if field.name not in TargetTable._ignore_primary_key and field.is_pk:
-            self.primary_key = self.primary_key + ',' + field.name if self.primary_key else field.name
-
-        # Список первичных ключей для опции distributed by.
-        # Заполняется только если колонка EXCEL "Distribution_field" - пустая
-        if not self.distribution_field:
-            self.distributed_by = self.primary_key
-
-
-        # Список полей для расчета hash
-        if field.name not in TargetTable._ignore_hash_fields and field.is_pk is False:
-            self.hash_fields.append(field.name)
-
-        # Список первичных ключей для опции multi_fields.
-        # Поля, которые являются ссылками на hub - не включаются
-        if field.is_pk and not field.properties.get("is_hub_field", False) and field.name not in TargetTable._ignore_multi_fields:
-            self.multi_fields.append(field.name)
+        # Если для типа поля задан псевдоним, то в список добавляется CehField, иначе - само поле
+        ceh_data_type = self.ceh_aliases.get(field.data_type)
+        if ceh_data_type is None:
+            self.resource_ceh_fields.append(field)
+        else:
+            self.resource_ceh_fields.append(CehField(field, ceh_data_type))
+
+    def get_field(self, name: str) -> DataBaseField | None:
+        return self.fields_by_name.get(name)
+
+    def _get_key_lists(self) -> dict:
+        if self._key_lists is not None:
+            return self._key_lists
+
+        primary_key = []
+        hash_fields = []
+        multi_fields = []
+        # Поля обрабатываются в порядке добавления
+        for field in self.fields_by_name.values():
+            if field.name not in TargetTable._ignore_primary_key and field.is_pk:
+                primary_key.append(field.name)
+
+            # Список полей для расчета hash
+            if field.name not in TargetTable._ignore_hash_fields and field.is_pk is False:
+                hash_fields.append(field.name)
+
+            # Список первичных ключей для опции multi_fields.
+            # Поля, которые являются ссылками на hub - не включаются
+            if field.is_pk and not field.is_hub_field and field.name not in TargetTable._ignore_multi_fields:
+                multi_fields.append(field.name)
+
+        primary_key_str = ','.join(primary_key)
+        self._key_lists = {
+            'primary_key': primary_key_str,
+            # Список первичных ключей для опции distributed by.
+            # Заполняется только если колонка EXCEL "Distribution_field" - пустая
+            'distributed_by': self.distribution_field if self.distribution_field else primary_key_str,
+            'hash_fields': sorted(hash_fields),
+            'multi_fields': sorted(multi_fields),
+        }
+        return self._key_lists
+
+    @property
+    def primary_key(self) -> str:
+        return self._get_key_lists()['primary_key']
+
+    @property
+    def distributed_by(self) -> str:
+        return self._get_key_lists()['distributed_by']
+
+    @property
+    def hash_fields(self) -> list[str]:
+        return self._get_key_lists()['hash_fields']
+
+    @property
+    def multi_fields(self) -> list[str]:
+        return self._get_key_lists()['multi_fields']
 
     def add_hub_field(self, hub: 'HubMartField'):
         self.hub_fields.append(hub)
@@ -141,7 +241,7 @@ class TargetTable:
     # Это "заморочка", что-бы отработал Ripper, который циклится на списке полей в таблице из-за
     # некорректного регулярного выражения. А так - работает. :-)
     def fields_sort(self):
-        self.fields.sort(key = lambda obj: ('A' if obj.is_pk else 'B') + obj.name)
+        self.fields.sort(key = lambda obj: (not obj.is_pk, obj.name))
 
 
 class Source:
@@ -162,12 +262,12 @@ class Source:
         self.short_name = create_short_name(name=self.table, short_name_len=22, random_str_len=6)
 
         # Для разных схем формирование имени может различаться
-        uni_resource_template = Config.config.get("uni_resource_template", None)
-        if uni_resource_template is None:
+        # Шаблон компилируется один раз при чтении файла конфигурации
+        template = Config.get_string_template("uni_resource_template")
+        if template is None:
             self.uni_res = self.system.lower() + '.' + self.schema.lower() + '.' + self.table.lower()
         else:
             # До момента вызова этой строки все необходимые переменные должны быть определены!
-            template = Config.env.from_string(uni_resource_template)
             self.uni_res = template.render(uni=self)
 
         self.resource_cd = self.uni_res
@@ -209,6 +309,7 @@ class LocalMetric:
         self.name=name.lower()
 
 class MartField:
+    __slots__ = ('tgt_field', 'value_type', 'value', 'expression', 'tgt_field_type', 'is_hub_field')
 
     def __init__(self, tgt_field: str, value_type: str, value: str, expression: str, tgt_field_type: str, is_hub_field = False):
         self.tgt_field = tgt_field
@@ -280,6 +381,10 @@ class MartField:
         return fld
 
 class HubMartField:
+    __slots__ = ('schema', 'hub_table', 'table', 'hub_name_only', 'full_table_name', 'resource_cd', 'short_name',
+                 'rk_field', 'id_field', 'mart_retain_key', 'business_key_schema', 'bk_schema_name', 'on_full_null',
+                 'src_attribute', 'expression', 'src_type', 'field_type', 'is_bk', 'src_cd', 'actual_dttm_name')
+
     def __init__(self, hub_table: str, rk_field: str, business_key_schema: str, on_full_null: str, src_attribute: str,
                  src_type: str, field_type: str, is_bk: bool, schema: str, expression: str, mart_retain_key:str):
 
@@ -333,6 +438,8 @@ class Mart:
 
         # Список полей mart-таблицы
         self.fields = []
+        # Поля mart-таблицы по имени (tgt_field) для проверки повторов
+        self._fields_index: dict[str, MartField] = dict()
         #  Список hub - таблиц, связанных с mart
         self.mart_hub_list = []
 
@@ -372,10 +479,11 @@ class Mart:
             return
 
         # Проверяем, если поле уже присутствует, то выдается ошибка
-        if [ctx.tgt_field for ctx in self.fields if ctx.tgt_field == mart_field.tgt_field]:
+        if mart_field.tgt_field in self._fields_index:
             msg = f'Поле "{mart_field.tgt_field}" уже присутствует в списке полей'
             raise IncorrectMappingException(msg)
 
+        self._fields_index[mart_field.tgt_field] = mart_field
         self.fields.append(mart_field)
 
     def add_mart_hub_list(self, mart_hub: HubMartField):
@@ -396,7 +504,12 @@ class FlowContext:
     # processed_dt_format: str
 
 
-    def __init__(self, flow_name : str):
+    def __init__(self, flow_name : str, diagnostics: Diagnostics | None = None, run_metrics: RunMetrics | None = None):
+
+        # Ошибки/предупреждения, обнаруженные при формировании потока
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics()
+        # Время формирования файлов потока
+        self.run_metrics = run_metrics if run_metrics is not None else RunMetrics()
 
         self.tags = []
         self.resource_tags = []
@@ -406,10 +519,15 @@ class FlowContext:
         self.marts = []
         self.target_tables = []
         self.hubs = []
+        # Хабы потока по полному имени таблицы (full_table_name)
+        self._hubs_index: dict[str, HubMartField] = dict()
 
         self.flow_name = flow_name
         self.base_flow_name = flow_name.removeprefix('wf_')
 
+        # "Короткие имена" источников, целевых таблиц и хабов потока
+        self.short_names = ShortNameRegistry()
+
         self.processed_dt: str = Config.config.get('processed_dt', 'processed_dt_не_определено')
         self.processed_dt_conversion = Config.config.get('processed_dt_conversion', 'processed_dt_conversion_не_определено')
 
@@ -422,10 +540,13 @@ class FlowContext:
 
 
     def add_source(self, source: Source):
+        source.short_name = self.short_names.register(key=source.resource_cd, name=source.table,
+                                                      short_name=source.short_name)
         self.sources.append(source)
 
     def add_target(self, target: Target):
-
+        target.short_name = self.short_names.register(key=target.resource_cd, name=target.table,
+                                                      short_name=target.short_name)
         self.targets.append(target)
 
     def add_local_metric(self, local_metric: LocalMetric):
@@ -437,7 +558,10 @@ class FlowContext:
 
         # Формируем уникальный список хабов потока
         for hub in mart.mart_hub_list:
-            if not [True for ctx in self.hubs if ctx.full_table_name == hub.full_table_name]:
+            hub.short_name = self.short_names.register(key=hub.resource_cd, name=hub.hub_table,
+                                                       short_name=hub.short_name)
+            if hub.full_table_name not in self._hubs_index:
+                self._hubs_index[hub.full_table_name] = hub
                 self.hubs.append(hub)
 
 
@@ -481,8 +605,11 @@ class FlowContext:
 
 
     def add_target_table(self, target_table: TargetTable):
-        target_table.multi_fields.sort()
-        target_table.hash_fields.sort()
-
+        # Списки hash_fields и multi_fields формируются в TargetTable в отсортированном виде
         target_table.fields_sort()
         self.target_tables.append(target_table)
+
+        # Список полей для расчета hash, проверка количества
+        if len(target_table.hash_fields) > 100:
+            self.diagnostics.warning("Количество полей для расчета hash_diff в таблице %s более 100",
+                                     target_table.table_name, flow=self.flow_name, table=target_table.table_name)
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.config import Config
+from core.mapping import MappingMeta
+
+# Файл со "слепками" исходных данных сформированных потоков. Находится в каталоге out_path
+MANIFEST_FILE: str = '.generator_manifest.json'
+# Версия формата файла. При изменении версии все потоки формируются заново
+MANIFEST_VERSION: int = 1
+
+# Параметры файла конфигурации, которые не влияют на содержимое файлов потоков
+_CONFIG_IGNORE: set = {'excel_file', 'out_path', 'log_file', 'log_level', 'log_viewer', 'colorlog',
+                       'template_cache_path', 'mapping_cache_path', 'mapping_cache_size'}
+
+
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Хэш каждой строки DataFrame. Номер строки EXCEL не учитывается: вставка строк в маппинг
+    не должна приводить к повторному формированию всех потоков
+    """
+    df = df.drop(columns=['excel_row_num'], errors='ignore')
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _update_code_hash(digest) -> None:
+    """
+    Добавляет в хэш исходные тексты модулей генератора (каталог core). После обновления программы,
+    изменившего логику формирования файлов, все потоки формируются заново
+    """
+    code_path = os.path.dirname(os.path.abspath(__file__))
+    for file_name in sorted(os.listdir(code_path)):
+        if not file_name.endswith('.py'):
+            continue
+        digest.update(file_name.encode())
+        with open(os.path.join(code_path, file_name), 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+
+
+def _common_hash() -> str:
+    """
+    Хэш данных, общих для всех потоков: версия программы, параметры файла конфигурации и файлы шаблонов
+    """
+    digest = hashlib.sha256()
+    digest.update(str(MANIFEST_VERSION).encode())
+    _update_code_hash(digest)
+
+    config = {key: value for key, value in Config.config.items() if key not in _CONFIG_IGNORE}
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode())
+
+    for root, _, files in sorted(os.walk(Config.templates_path)):
+        for file_name in sorted(files):
+            file_path = os.path.join(root, file_name)
+            digest.update(os.path.relpath(file_path, Config.templates_path).encode())
+            with open(file_path, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+
+    return digest.hexdigest()
+
+
+def flow_fingerprints(mapping_meta: MappingMeta) -> dict[str, str]:
+    """
+    Формирует "слепок" исходных данных каждого потока: строки листа 'Перечень загрузок Src-RDV' потока,
+    строки листа 'Детали загрузок Src-RDV' целевых таблиц и таблиц-источников потока,
+    параметры файла конфигурации и файлы шаблонов.
+    Хэши строк вычисляются один раз для всего маппинга.
+
+    Returns: {имя_потока: слепок}
+    """
+    common_hash = _common_hash()
+
+    mapping_list = mapping_meta.mapping_list
+    mapping_df = mapping_meta.mapping_df
+
+    list_hashes = _row_hashes(mapping_list)
+    detail_hashes = _row_hashes(mapping_df)
+
+    # Позиции строк листа 'Детали загрузок Src-RDV' по целевой таблице и по таблице-источнику
+    tgt_index: dict = mapping_df.groupby('tgt_table', sort=False).indices
+    src_index: dict = mapping_df.groupby(mapping_df['src_table'].str.upper(), sort=False).indices
+
+    tgt_tables = mapping_list['tgt_table'].str.replace(r"\s", '', regex=True).to_numpy()
+    src_tables = mapping_list['src_table'].str.replace(r"\s", '', regex=True).str.upper().to_numpy()
+    empty = np.empty(0, dtype=np.intp)
+
+    fingerprints: dict[str, str] = dict()
+    for flow_name, positions in mapping_list.groupby('flow_name', sort=False).indices.items():
+        detail_positions = np.unique(np.concatenate(
+            [tgt_index.get(tgt_tables[pos], empty) for pos in positions] +
+            [src_index.get(src_tables[pos], empty) for pos in positions]))
+
+        digest = hashlib.sha256(common_hash.encode())
+        digest.update(list_hashes[positions].tobytes())
+        digest.update(detail_hashes[detail_positions].tobytes())
+        fingerprints[flow_name] = digest.hexdigest()
+
+    return fingerprints
+
+
+def read_manifest(out_path: str) -> dict[str, str]:
+    """
+    Считывает "слепки" потоков, сформированных при предыдущем запуске.
+    Если файл отсутствует, поврежден или имеет другую версию, то возвращается пустой словарь
+    """
+    file_path = os.path.join(out_path, MANIFEST_FILE)
+    if not os.path.isfile(file_path):
+        return dict()
+
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        logging.warning(f'Не удалось прочитать файл "{file_path}". Все потоки будут сформированы заново')
+        return dict()
+
+    if manifest.get('version') != MANIFEST_VERSION:
+        return dict()
+
+    return manifest.get('flows', dict())
+
+
+def write_manifest(out_path: str, flows: dict[str, str]) -> None:
+    """
+    Сохраняет "слепки" сформированных потоков
+    """
+    file_path = os.path.join(out_path, MANIFEST_FILE)
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'flows': flows}, f, ensure_ascii=False, indent=2, sort_keys=True)
@@ -1,31 +1,70 @@
-import copy
 import io
 import logging
+import multiprocessing
 import os
+import random
 import re
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from pandas import DataFrame
 
 from core import mapping
 from core.config import Config
+from core.diagnostics import Diagnostics, SEVERITY_ERROR, SEVERITY_WARNING
 from core.exportdata import ExportData
 from core.flowcontext import FlowContext, Source, Target, Mart, MartField, HubMartField, LocalMetric, TargetTable, \
     DataBaseField
+from core.manifest import flow_fingerprints, read_manifest, write_manifest
 from core.mapping import MappingMeta
+from core.run_metrics import RunMetrics, SPAN_STAGE, SPAN_FLOW
+from core.staging import STAGING_NONE, STAGING_FLOW, STAGING_RUN, staged_flow_path, publish_flow, discard_flow, \
+    is_staged, clear_staging
 from core.stream_header_data import StreamHeaderData
+from core.validation import MappingValidation
 
 
-def mapping_generator(file_path: str, out_path: str) -> None:
+def mapping_generator(file_path: str, out_path: str, validate_only: bool = False, jobs: int = 1,
+                      force: bool = False, staging: str = STAGING_NONE, write_threads: int = 0,
+                      use_cache: bool = True, trace_memory: bool = False) -> Diagnostics:
     """Функция считывает данные из EXCEL, составляет список потоков и запускает процесс формирования файлов для каждого
      потока
 
     Args:
         file_path (str): Полный путь к файлу маппинга RDV
         out_path (str): Каталог, в котором будут сформированы подкаталоги с описанием потоков
+        validate_only (bool): Только проверка маппинга, файлы потоков не формируются
+        jobs (int): Количество процессов для формирования потоков. 0 - по количеству процессоров
+        force (bool): Формировать все потоки, в том числе не изменившиеся с предыдущего запуска
+        staging (str): Режим публикации файлов потоков: STAGING_NONE, STAGING_FLOW или STAGING_RUN
+        write_threads (int): Количество потоков (threads) для записи файлов. 0 - файлы записываются сразу
+        use_cache (bool): Загружать данные маппинга из кэша, если книга EXCEL не изменилась
+        trace_memory (bool): Измерять объем памяти этапов обработки, потоков и шаблонов (tracemalloc)
+
+    Returns:
+        Diagnostics: Ошибки и предупреждения, обнаруженные при обработке
     """
 
-    Config.is_warning = False
-    Config.is_error = False
+    diagnostics = Diagnostics()
+
+    # Время выполнения этапов обработки выводится в журнал и в файл METRICS_FILE в каталоге out_path
+    run_metrics = RunMetrics(trace_memory=trace_memory)
+    run_metrics.start()
+    try:
+        _generate(file_path=file_path, out_path=out_path, validate_only=validate_only, jobs=jobs, force=force,
+                  staging=staging, write_threads=write_threads, use_cache=use_cache, diagnostics=diagnostics,
+                  run_metrics=run_metrics)
+    finally:
+        run_metrics.stop()
+        run_metrics.log_summary()
+        run_metrics.write(out_path)
+
+    return diagnostics
+
+
+def _generate(file_path: str, out_path: str, validate_only: bool, jobs: int, force: bool, staging: str,
+              write_threads: int, use_cache: bool, diagnostics: Diagnostics, run_metrics: RunMetrics) -> None:
+    """Считывает данные из EXCEL и формирует потоки. Параметры - см. mapping_generator"""
 
     logging.info(f"file_path: {file_path}")
     logging.info(f"out_path: {out_path}")
@@ -35,41 +74,38 @@ def mapping_generator(file_path: str, out_path: str) -> None:
 
     # Чтение данных их EXCEL
     try:
-        with open(file_path, 'rb') as f:
+        with run_metrics.span(SPAN_STAGE, 'read_file'), open(file_path, 'rb') as f:
             byte_data = io.BytesIO(f.read())
 
     except FileNotFoundError:
-        logging.error(f"Не найден файл '{file_path}'")
-        Config.is_error = True
+        diagnostics.error("Не найден файл '%s'", file_path)
         return
 
     except Exception as err:
         msg = f"Ошибка чтения данных из файла {file_path}"
         logging.exception(msg)
-        Config.is_error = True
         raise err
 
-    src_attr_datatypes = Config.field_type_list['src_attr_datatype']
-    tgt_attr_datatypes = Config.field_type_list['tgt_attr_datatype']
-    tgt_attr_predefined_datatypes: dict = Config.field_type_list['tgt_attr_predefined_datatype']
-    ignore_field_map_ctx_list: dict = Config.setting_up_field_lists['ignore_field_map_ctx_list']
-
-    tgt_attr_name_regexp_pattern: str = Config.get_regexp('tgt_attr_name_regexp')
-
-    pattern_bk_schema: str = Config.get_regexp('bk_schema_regexp')
-    pattern_bk_object: str = Config.get_regexp('bk_object_regexp')
-
-    processed_dt = Config.config.get('processed_dt', 'processed_dt')
-    processed_dt_conversion = Config.config.get('processed_dt_conversion', 'second')
 
     corresp_datatype: dict = Config.field_type_list.get('corresp_datatype', dict())
     if len(corresp_datatype) == 0:
-        Config.is_warning = True
-        logging.warning('Не найден параметр "corresp_datatype" в файле конфигурации')
+        diagnostics.warning('Не найден параметр "corresp_datatype" в файле конфигурации')
         logging.warning("Проверка соответствия типов полей источника и целевой таблицы производится не будет")
 
     # Данные EXCEL
-    mapping_meta = MappingMeta(byte_data)
+    with run_metrics.span(SPAN_STAGE, 'mapping'):
+        mapping_meta = MappingMeta(byte_data, diagnostics, use_cache=use_cache, run_metrics=run_metrics)
+
+    # Проверка данных маппинга выполняется один раз, до формирования потоков
+    with run_metrics.span(SPAN_STAGE, 'validation'):
+        validation = MappingValidation(mapping_meta)
+    logging.info(f"Проверка маппинга: ошибок - {(validation.errors['severity'] == SEVERITY_ERROR).sum()}, "
+                 f"предупреждений - {(validation.errors['severity'] == SEVERITY_WARNING).sum()}")
+
+    if validate_only:
+        MappingValidation.log_errors(validation.errors, diagnostics)
+        logging.info('Файлы потоков не формируются (режим проверки маппинга)')
+        return
 
     # Цикл по списку потоков
     flow_list = mapping_meta.mapping_list['flow_name'].unique()
@@ -78,357 +114,541 @@ def mapping_generator(file_path: str, out_path: str) -> None:
     logging.info('Формирование файлов описания потоков ...')
 
     if len(flow_list) == 0:
-        logging.warning("Ни один из потоков не будет сформирован, т.к. не найдено соответствие имени потока шаблонам")
+        diagnostics.warning("Ни один из потоков не будет сформирован, т.к. не найдено соответствие имени потока шаблонам")
         logging.warning("Проверьте список шаблонов в секции 'wf_templates_list' в файле конфигурации")
         logging.info('')
-        Config.is_warning = True
         return
 
-    for wrk_index in range(len(flow_list)):
-
-        flow_name = flow_list[wrk_index]
-        is_table_error = False
-
-        flow_context = FlowContext(flow_name)
-
-        # Цикл по списку целевых таблиц
-        for _, row in mapping_meta.mapping_list.query(f'flow_name == "{flow_name}"').iterrows():
-
-            logging.info('')
-            logging.info(f">>>>> Поток: {wrk_index + 1}: {flow_name}")
-
-            # Данные строки "Перечень загрузок Src-RDV" листа для таблицы
-            sh_data = StreamHeaderData(row=row)
-
-            # Умеем работать только с MART-таблицами
-            if sh_data.target_rdv_object_type != 'MART':
-                logging.error(f"Программа не поддерживает обработку целевых объектов с типом "
-                              f"{sh_data.target_rdv_object_type}")
-                Config.is_error = True
-                continue
-
-            # Полное имя таблицы: схема + имя_таблицы
-            tgt_full_name = sh_data.tgt_full_name
-
-            # Данные для заданной целевой таблицы
-            tgt_mapping: DataFrame = mapping_meta.get_mapping_by_tgt_table(tgt_full_name)
-
-            logging.info('')
-
-            if len(tgt_mapping) == 0:
-                msg = f"Не найдена таблица {tgt_full_name} на листе 'Детали загрузок Src-RDV'"
-                logging.error(msg)
-                is_table_error = True
-                continue
-
-            # Проверяем таблицу-источник
-            pattern: str = Config.get_regexp('src_table_name_regexp')
-            if not re.match(pattern, sh_data.src_full_name):
-                logging.error(f'Имя таблицы-источника "{sh_data.src_full_name}" на листе "Перечень загрузок Src-RDV"'
-                              f' не соответствует шаблону "{pattern}"')
-                is_table_error = True
-                continue
-
-            logging.info(f'Схема данных:     {sh_data.src_schema}')
-            logging.info(f'Таблица-источник: {sh_data.src_full_name}')
-
-            # Проверяем соответствие названия целевой таблицы шаблону
-            pattern: str = Config.get_regexp('tgt_table_name_regexp')
-            if not re.match(pattern, tgt_full_name):
-                logging.error(f'Целевая таблица: "{tgt_full_name}" на листе "Перечень загрузок Src-RDV" '
-                              f'не соответствует шаблону "{pattern}"')
-                is_table_error = True
-                continue
-
-            logging.info(f'Целевая таблица:  {tgt_full_name}')
-
-            # Возвращает наименование (логическое) "источника" для заданной целевой таблицы - поле src_sd
-            src_cd: str | None = mapping_meta.get_src_cd_by_table(tgt_full_name)
-            if not src_cd:
-                logging.error(f'Для целевой таблицы "{tgt_full_name}" неверно задано/не задано имя источника')
-                logging.error('Имя источника задается в колонке "Expression" для поля "src_cd"')
-                is_table_error = True
-                continue
-
-            logging.info(f'Источник данных (src_cd): {src_cd}')
-
-            # Имя источника - Source_name
-            if not sh_data.source_system:
-                logging.error(f'Для таблицы {tgt_full_name} неверно задано/не задано поле "Источник данных'
-                              f' (транспорт)"/Source_name')
-                is_table_error = True
-                continue
-            logging.info(f'Система - Источник данных: {sh_data.source_system}')
-
-            # Алгоритм - Algorithm_UID
-            algorithm_uid: str = sh_data.algorithm_uid
-            if not algorithm_uid:
-                logging.error(f'Для таблицы {tgt_full_name} неверно задано/не задано поле "UID алгоритма"/"Algorithm_UID"')
-                is_table_error = True
-                continue
-            logging.info(f'Код алгоритма: {algorithm_uid}')
-
-            subalgorithm_uid: str = str(sh_data.subalgorithm_uid).strip()
-            if not subalgorithm_uid:
-                logging.error(f'Для таблицы {tgt_full_name} неверно задано/не задано поле "UID субалгоритма"/"Sub_UID"')
-                is_table_error = True
-                continue
-
-            if not subalgorithm_uid.isdigit():
-                logging.error(f'Поле "UID суб-алгоритма"/"Sub_UID" должно быть целым числом')
-                logging.error(f'Код суб-алгоритма: "{subalgorithm_uid}"')
-                is_table_error = True
-                continue
-
-            logging.info(f'Код суб-алгоритма: "{subalgorithm_uid}"')
-
-            ceh_resource: str = "ceh." + tgt_full_name
-
-            # Внешняя таблица - источник
-            source_name_schema = Config.config.get('source_name_schema', sh_data.src_schema)
-            source_system = Config.config.get('source_name', sh_data.source_system)
-
-            source = Source(system=source_system, schema=source_name_schema, table=sh_data.src_table,
-                            algorithm_uid=algorithm_uid, algorithm_uid_2=subalgorithm_uid, ceh_resource=ceh_resource,
-                            src_cd=src_cd, data_capture_mode=Config.data_capture_mode)
-
-            # Поля таблицы - источника
-            src_mapping = mapping_meta.get_mapping_by_src_table(src_table=sh_data.src_full_name)
-            # Список полей - дубликатов в источнике
-            dupl = mapping.get_duplicate_list(df=src_mapping, column_name='src_attribute')
-
-            if len( dupl ) > 0:
-                logging.debug(f"В таблице-источнике {sh_data.src_full_name} указаны повторяющиеся названия полей")
-                logging.debug(str(dupl))
-                logging.debug('При формировании файла описания таблицы источника дубликаты будут удалены')
-
-            # Удаляем дубликаты имен полей из списка полей таблицы-источника
-            src_mapping = src_mapping.drop_duplicates(subset=['src_attribute'], keep='first')
-            # Формируем список полей источника
-            for s_index, s_row in src_mapping.iterrows():
-
-                # Проверяем типы полей источника
-                if s_row['src_attr_datatype'] not in src_attr_datatypes:
-                    logging.warning(f'Тип поля "{s_row['src_attribute']}" в таблице источнике "{s_row['src_attr_datatype']}" '
-                                    f'не входит в список разрешенных типов')
-                    Config.is_warning = True
-
-                source.add_field(DataBaseField(name=s_row['src_attribute'], data_type=s_row['src_attr_datatype'],
-                                               comment=s_row['comment'], is_nullable=False, is_pk=s_row['src_pk'],
-                                               properties = dict()))
-
-            flow_context.add_source(source)
-            uni_resource_cd = source.resource_cd
-
-            # Целевая таблица
-            target = Target(schema=sh_data.tgt_schema, table = sh_data.tgt_table, src_cd=src_cd.lower(),
-                            object_type=sh_data.target_rdv_object_type, uni_resource_cd=uni_resource_cd)
-
-            # Секция "local_metrics". Данные формируются для каждой таблицы. Но используется перове значение.
-            local_metric: LocalMetric = (
-                LocalMetric(processed_dt_conversion=processed_dt_conversion,
-                            processed_dt=processed_dt,
-                            algo=sh_data.algorithm_uid,
-                            system=sh_data.source_system,
-                            schema=sh_data.src_schema,
-                            name=sh_data.src_table))
-            flow_context.add_local_metric(local_metric=local_metric)
-
-            flow_context.add_target(target)
-
-            delta_mode = Config.config.get("delta_mode", 'new')
-
-            mart_mapping: Mart = (
-                Mart(short_name=target.short_name, algorithm_uid=sh_data.algorithm_uid,
-                     algorithm_uid_2=sh_data.subalgorithm_uid, target=target.short_name, source=source.short_name,
-                     delta_mode=delta_mode, processed_dt=processed_dt, algo=sh_data.algorithm_uid,
-                     source_system=sh_data.source_system, source_schema=sh_data.src_schema,
-                     source_name=sh_data.src_table,
-                     table_name=sh_data.tgt_table,
-                     src_cd=src_cd, comment=sh_data.comment, uni_resource_cd=uni_resource_cd)
-            )
-
-            # Цикл по полям целевой таблицы
-            for f_index, f_row in tgt_mapping.iterrows():
-                mart_field = MartField.create_mart_field(f_row)
-                mart_mapping.add_fields(copy.deepcopy(mart_field))
-
-                if mart_field.is_hub_field:
-                    logging.debug(f"Поле '{mart_field.tgt_field}' не будет добавлено в секцию 'field_map', "
-                                    f"т.к. присутствует в секции 'hub_map'")
-
-                # Проверяем типы полей целевой таблицы
-                if f_row['tgt_attr_datatype'] not in tgt_attr_datatypes:
-                    logging.warning(f'Тип поля "{f_row['tgt_attribute']}"/"{f_row['tgt_attr_datatype']}" в целевой таблице '
-                                    f'не входит в список разрешенных типов')
-                    Config.is_warning = True
-
-                # Проверяем соответствие типа данных полей источника и целевой таблицы
-                if len (corresp_datatype) != 0  and f_row['src_attribute'] != '':
-                    if f_row['src_attr_datatype'] not in corresp_datatype:
-                        logging.warning(f"Тип данных поля источника '{f_row['src_attr_datatype']}' отсутствует в 'corresp_datatype'")
-                        Config.is_warning= True
-
-                    elif f_row["tgt_attr_datatype"] not in corresp_datatype[f_row['src_attr_datatype']]:
-                        logging.warning(f"Тип данных '{f_row['tgt_attr_datatype']}' поля целевой таблицы "
-                                      f"'{f_row['tgt_attribute']}' "
-                                      f"не найден списке в 'corresp_datatype' "
-                                      f"{f_row['src_attr_datatype']}:{corresp_datatype[f_row['src_attr_datatype']]}")
-                        Config.is_warning = True
-
-                # Проверяем соответствие названия полей целевой таблицы шаблону
-                if not re.match(tgt_attr_name_regexp_pattern, f_row['tgt_attribute']):
-                    logging.error(f"Название поля целевой таблицы {f_row['tgt_attribute']} "
-                                  f"не соответствует шаблону '{tgt_attr_name_regexp_pattern}'")
-                    Config.is_error = True
-
-                # Проверяем наличие данных для полей целевой таблицы
-                if not f_row['src_attribute'] and not f_row['expression']:
-                    if not f_row['tgt_attribute'] in ignore_field_map_ctx_list:
-                        logging.warning(f"Для поля {f_row['tgt_attribute']} целевой таблицы не указано "
-                                        f"поле в источнике (src_attr) или расчетное значение (expression)")
-                        Config.is_warning = True
-
-            # Проверка полей целевой таблицы, тип которых фиксирован
-            for fld_name in tgt_attr_predefined_datatypes.keys():
-                err_rows = tgt_mapping.query(f"tgt_attribute == '{fld_name}'")[['tgt_attribute', 'tgt_attr_datatype', 'tgt_attr_mandatory']]
-                if len(err_rows) == 0:
-                    logging.error(f"Не найден обязательный атрибут '{fld_name}'")
-                    Config.is_error = True
-
-                elif len(err_rows) > 1:
-                    logging.error(f"Обязательный атрибут '{fld_name}' указан более одного раза\n" + str(err_rows))
-                    Config.is_error = True
-
-                else:
-                    if (err_rows.iloc[0]['tgt_attr_datatype'] != tgt_attr_predefined_datatypes[fld_name][0] or
-                            err_rows.iloc[0]['tgt_attr_mandatory'] != tgt_attr_predefined_datatypes[fld_name][1]):
-                        logging.error(
-                            f"Параметры обязательного атрибута '{fld_name}' указаны неверно\n" + str(err_rows))
-
-                        Config.is_error = True
-
-
-            #  Описание MART - таблицы со всеми "вложениями"
-            target_table = TargetTable(schema=sh_data.tgt_schema, table_name=sh_data.tgt_table, comment=sh_data.comment,
-                                       table_type=sh_data.target_rdv_object_type, src_cd=src_cd,
-                                       distribution_field=sh_data.distribution_field)
-
-            distribution_field_list = copy.deepcopy(sh_data.distribution_field_list)
-
-            #  Список полей целевой таблицы
-            for f_index, f_row in tgt_mapping.iterrows():
-
-                properties = dict()
-                if f_row["attr:conversion_type"] == 'hub':
-                    properties["is_hub_field"] = True
-                    properties["hub"] = []
-
-                    # Контроль названия бк-схемы и имени хаба
-                    bk_schema = f_row['attr:bk_schema']
-                    if not re.match(pattern_bk_schema, bk_schema):
-                        logging.error(
-                            f'Имя бк-схемы "{bk_schema}" на листе "Детали загрузок Src-RDV"'
-                            f' не соответствует шаблону "{pattern_bk_schema}"')
-                        is_table_error = True
-
-                    bk_object:str = f_row['attr:bk_object']
-                    if not re.match(pattern_bk_object, bk_object):
-                        logging.error(
-                            f'Имя хаба "{bk_object}" на листе "Детали загрузок Src-RDV"'
-                            f' не соответствует шаблону "{pattern_bk_object}"')
-                        logging.warning("Ожидаемая структура поля: СХЕМА.ТАБЛИЦА.RK-ПОЛЕ или СХЕМА.ТАБЛИЦА")
-                        is_table_error = True
-
-                    # if len(f_row['attr:bk_object'].split('.')) != 3:
-                    #     logging.warning(f"Значение в поле 'attr:bk_object' состоит не из 3-х частей: {f_row['attr:bk_object']}")
-                    #     logging.warning("Проверьте корректность заполнения поля")
-                    #     logging.warning("Ожидаемая структура поля: СХЕМА.ТАБЛИЦА.RK-ПОЛЕ или СХЕМА.ТАБЛИЦА")
-                    #     Config.is_warning = True
-
-                    # Если rk-поле прописано в "attr:bk_object", то берем его оттуда
-                    rk_field = f_row['tgt_attribute'] if len(f_row['attr:bk_object'].split('.')) == 2 else f_row['attr:bk_object'].split('.')[2]
-
-                    mart_hub = HubMartField(rk_field=rk_field, hub_table=f_row['attr:bk_object'].split('.')[1],
-                                            business_key_schema=f_row['attr:bk_schema'],
-                                            on_full_null=f_row['attr_nulldefault'], src_attribute=f_row['src_attribute'],
-                                            src_type=f_row['src_attr_datatype'], expression=f_row['expression'],
-                                            field_type=f_row['tgt_attr_datatype'],
-                                            is_bk=f_row['is_pk'], schema=f_row['attr:bk_object'].split('.')[0],
-                                            mart_retain_key=f_row['tgt_attribute'])
-
-                    # Привязываем hub к описанию mart-таблицы
-                    mart_mapping.add_mart_hub_list(mart_hub=mart_hub)
-                    # Привязываем hub к целевой таблице
-                    target_table.add_hub_field(mart_hub)
-
-
-                # Привязываем поле к целевой таблице
-                data_base_field = DataBaseField(name=f_row["tgt_attribute"], data_type=f_row['tgt_attr_datatype'],
-                                                comment=f_row["comment"],
-                                                is_nullable=f_row["tgt_attr_mandatory"] == 'null',
-                                                is_pk=f_row["is_pk"],
-                                                properties=properties)
-
-                target_table.add_field(field=data_base_field)
-
-                if len(distribution_field_list) > 0:
-                    if f_row["tgt_attribute"] in distribution_field_list:
-                        if f_row["is_pk"] is False:
-                            logging.warning(f"Поле '{f_row["tgt_attribute"]}' не имеющее признак 'PK' в колонке "
-                                            f"'Tgt_PK' указано в колонке 'Distribution_field' листа 'Перечень загрузок Src-RDV'")
-                            Config.is_warning = True
-                        else:
-                            distribution_field_list.remove(f_row["tgt_attribute"])
-
-
-            # Конец цикла по списку полей целевой таблицы ##############################################################
-
-            if len(distribution_field_list) > 0:
-                logging.error(f"Поля/поле '{distribution_field_list}', из колонки 'Distribution_field' листа "
-                              f"'Перечень загрузок Src-RDV', не найдены в колонке 'Tgt_attr' на листе "
-                              f"'Детали загрузок Src-RDV'")
-                Config.is_error = True
-
-            flow_context.add_target_table(target_table=target_table)
-
-            # Список полей для расчета hash, проверка количества
-            if len(target_table.hash_fields) > 100:
-                logging.warning(f"Количество полей для расчета hash_diff в таблице {target_table.table_name} более 100")
-                Config.is_warning = True
-
-            # Добавляем описание mart к потоку
-            flow_context.add_mart(mart_mapping)
-
-        # Конец цикла по списку таблиц #################################################################################
-
-        if is_table_error:
-            Config.is_error = True
-            logging.error(f'Файлы потока "{flow_name}" не были сформированы!')
-            continue
+    # Потоки, исходные данные которых не изменились с предыдущего запуска, повторно не формируются
+    with run_metrics.span(SPAN_STAGE, 'fingerprints'):
+        fingerprints = flow_fingerprints(mapping_meta)
+        manifest = read_manifest(out_path)
+    flow_tasks: list[tuple[int, str]] = [
+        (wrk_index, flow_name) for wrk_index, flow_name in enumerate(flow_list)
+        if force or manifest.get(flow_name) != fingerprints[flow_name]
+        or not os.path.isdir(os.path.join(out_path, flow_name))
+    ]
+
+    if len(flow_tasks) < len(flow_list):
+        logging.info(f'Потоки, не изменившиеся с предыдущего запуска, не формируются: '
+                     f'{len(flow_list) - len(flow_tasks)} из {len(flow_list)}')
+        logging.info('Для формирования всех потоков используйте параметр --force')
+
+        # Результат обработки (код завершения программы) не зависит от того, формировались ли файлы потока заново
+        task_flows: set = {flow_name for _, flow_name in flow_tasks}
+        for flow_name in flow_list:
+            if flow_name not in task_flows:
+                _log_unchanged_flow_errors(flow_name=flow_name, mapping_meta=mapping_meta, validation=validation,
+                                           diagnostics=diagnostics)
+
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(flow_tasks))
+
+    # Файлы потоков подготавливаются в каталоге STAGING_DIR, который удаляется по окончании работы
+    if staging != STAGING_NONE:
+        clear_staging(out_path)
+
+    try:
+        with run_metrics.span(SPAN_STAGE, 'flows'):
+            if jobs == 1:
+                write_executor = ThreadPoolExecutor(max_workers=write_threads) if write_threads > 0 else None
+                try:
+                    for wrk_index, flow_name in flow_tasks:
+                        generate_flow(wrk_index=wrk_index, flow_name=flow_name, mapping_meta=mapping_meta,
+                                      validation=validation, out_path=out_path, diagnostics=diagnostics,
+                                      staging=staging, write_executor=write_executor, run_metrics=run_metrics)
+                finally:
+                    if write_executor is not None:
+                        write_executor.shutdown()
+            elif jobs > 1:
+                _generate_flows_parallel(flow_tasks=flow_tasks, mapping_meta=mapping_meta, validation=validation,
+                                         out_path=out_path, jobs=jobs, diagnostics=diagnostics, staging=staging,
+                                         write_threads=write_threads, run_metrics=run_metrics)
+
+        # Каталоги потоков, сформированных без ошибок, заменяются после формирования всех потоков
+        if staging == STAGING_RUN:
+            error_flows = diagnostics.error_flows()
+            staged_flows = [flow_name for _, flow_name in flow_tasks
+                            if flow_name not in error_flows and is_staged(out_path, flow_name)]
+            published = 0
+            with run_metrics.span(SPAN_STAGE, 'publish'):
+                for flow_name in staged_flows:
+                    # Ошибка публикации одного потока не прерывает публикацию остальных потоков
+                    if _publish_flow(out_path, flow_name, diagnostics):
+                        published += 1
+            logging.info(f'Опубликованы каталоги потоков: {published} из {len(staged_flows)}')
+
+    finally:
+        if staging != STAGING_NONE:
+            clear_staging(out_path)
+
+    error_flows = diagnostics.error_flows()
+
+    # Потоки с ошибками при следующем запуске формируются заново
+    for _, flow_name in flow_tasks:
+        if flow_name in error_flows:
+            manifest.pop(flow_name, None)
+        else:
+            manifest[flow_name] = fingerprints[flow_name]
+    write_manifest(out_path, manifest)
+
+    # Конец цикла по списку потоков #№№№################################################################################
+
+    if diagnostics.is_error:
+        logging.error(f'Один или более потоков не были сформированы из-за обнаруженных ошибок')
+
+    logging.info('')
+
+    return
+
+
+def _generate_flows_parallel(flow_tasks: list[tuple[int, str]], mapping_meta: MappingMeta, validation: MappingValidation, out_path: str,
+                             jobs: int, diagnostics: Diagnostics, run_metrics: RunMetrics, staging: str = STAGING_NONE,
+                             write_threads: int = 0) -> None:
+    """Формирует потоки в нескольких процессах.
+    Данные маппинга передаются процессам один раз при их запуске: при fork - без копирования (copy-on-write),
+    при spawn (Windows) - в сериализованном виде. EXCEL повторно не читается.
+    Записи журнала каждого потока накапливаются в процессе и выводятся в основной журнал в порядке списка потоков.
+
+    Args:
+        flow_tasks: Список потоков (порядковый номер, имя потока)
+        mapping_meta (MappingMeta): Данные маппинга
+        validation (MappingValidation): Результаты проверки маппинга
+        out_path (str): Каталог, в котором будут сформированы подкаталоги с описанием потоков
+        jobs (int): Количество процессов
+        diagnostics (Diagnostics): Диагностика запуска, в которую добавляются результаты потоков
+        run_metrics (RunMetrics): Показатели запуска, в которые добавляются показатели потоков
+        staging (str): Режим публикации файлов потоков
+        write_threads (int): Количество потоков (threads) для записи файлов в каждом процессе
+    """
 
-        # Секция tags формируется последней
-        flow_context.tags_formation()
-        flow_context.author = Config.author
-        flow_context.data_capture_mode = Config.data_capture_mode
-        flow_context.delta_mode = Config.delta_mode
+    logging.info(f'Количество процессов для формирования потоков: {jobs}')
+
+    start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    config_state = {name: value for name, value in vars(Config).items()
+                    if not name.startswith('_') and name not in ('env', 'template_set', 'string_templates')
+                    and not isinstance(value, staticmethod)}
+
+    # Потоки передаются процессам порциями, чтобы снизить накладные расходы на обмен данными
+    chunksize = max(1, len(flow_tasks) // (jobs * 4))
+
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context(start_method),
+                             initializer=_init_flow_worker,
+                             initargs=(mapping_meta, validation, out_path, staging, write_threads, config_state,
+                                       logging.getLogger().level, run_metrics.trace_memory)) as executor:
+
+        # Результаты возвращаются в порядке списка потоков
+        for records, flow_diagnostics, flow_metrics, err in executor.map(_generate_flow_worker, flow_tasks,
+                                                                         chunksize=chunksize):
+            for record in records:
+                logging.getLogger().handle(record)
+            diagnostics.merge(flow_diagnostics)
+            run_metrics.merge(flow_metrics)
+
+            # Необрабатываемая ошибка потока прерывает формирование, как и при работе в одном процессе
+            if err is not None:
+                raise err
+
+
+# Данные процесса, формирующего потоки. Заполняются при запуске процесса в _init_flow_worker
+_worker_data: dict = dict()
+
+
+class _BufferHandler(logging.Handler):
+    """Накапливает записи журнала потока для передачи в основной процесс"""
+
+    def __init__(self):
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Сообщение и исключение форматируются в процессе, т.к. аргументы могут не сериализоваться
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
+
+
+def _init_flow_worker(mapping_meta: MappingMeta, validation: MappingValidation, out_path: str, staging: str,
+                      write_threads: int, config_state: dict, log_level: int, trace_memory: bool) -> None:
+    """Инициализация процесса, формирующего потоки"""
+
+    # При spawn настройки программы в процессе не загружены
+    if not hasattr(Config, 'config'):
+        for name, value in config_state.items():
+            setattr(Config, name, value)
+        # Скомпилированные шаблоны берутся из каталога template_cache_path
+        Config.init_templates()
+
+    # При fork процессы получают одинаковое состояние генератора случайных чисел
+    random.seed()
+
+    # Журнал пишет только основной процесс
+    root = logging.getLogger()
+    root.handlers = [_BufferHandler()]
+    root.setLevel(log_level)
+
+    _worker_data['mapping_meta'] = mapping_meta
+    _worker_data['validation'] = validation
+    _worker_data['out_path'] = out_path
+    _worker_data['staging'] = staging
+    _worker_data['trace_memory'] = trace_memory
+    if trace_memory:
+        tracemalloc.start()
+    # Пул создается в процессе: потоки (threads) основного процесса не наследуются при fork.
+    # Пул существует до завершения процесса
+    _worker_data['write_executor'] = ThreadPoolExecutor(max_workers=write_threads) if write_threads > 0 else None
+
+
+def _generate_flow_worker(task: tuple[int, str]) -> tuple[list[logging.LogRecord], Diagnostics, RunMetrics,
+                                                          Exception | None]:
+    """Формирует один поток в процессе.
+    Возвращает записи журнала, диагностику потока, показатели потока и необработанное исключение"""
+
+    wrk_index, flow_name = task
+    handler: _BufferHandler = logging.getLogger().handlers[0]
+    handler.records = []
+    diagnostics = Diagnostics()
+    run_metrics = RunMetrics(trace_memory=_worker_data['trace_memory'])
+
+    try:
+        generate_flow(wrk_index=wrk_index, flow_name=flow_name, mapping_meta=_worker_data['mapping_meta'],
+                      validation=_worker_data['validation'], out_path=_worker_data['out_path'],
+                      diagnostics=diagnostics, staging=_worker_data['staging'],
+                      write_executor=_worker_data['write_executor'], run_metrics=run_metrics)
+    except Exception as err:
+        return handler.records, diagnostics, run_metrics, err
+
+    return handler.records, diagnostics, run_metrics, None
+
+
+def generate_flow(wrk_index: int, flow_name: str, mapping_meta: MappingMeta, validation: MappingValidation,
+                  out_path: str, diagnostics: Diagnostics, staging: str = STAGING_NONE,
+                  write_executor: ThreadPoolExecutor | None = None, run_metrics: RunMetrics | None = None) -> None:
+    """Формирует описание одного потока (FlowContext) и выгружает файлы потока.
+    Потоки не зависят друг от друга, поэтому функция может выполняться в отдельном процессе.
+
+    Args:
+        wrk_index (int): Порядковый номер потока (для журнала)
+        flow_name (str): Имя потока
+        mapping_meta (MappingMeta): Данные маппинга
+        validation (MappingValidation): Результаты проверки маппинга
+        out_path (str): Каталог, в котором будут сформированы подкаталоги с описанием потоков
+        diagnostics (Diagnostics): Диагностика запуска
+        staging (str): Режим публикации файлов потока
+        write_executor (ThreadPoolExecutor): Пул потоков (threads) для записи файлов
+        run_metrics (RunMetrics): Показатели запуска
+    """
+
+    if run_metrics is None:
+        run_metrics = RunMetrics()
+
+    with run_metrics.span(SPAN_FLOW, flow_name):
+        with run_metrics.span(SPAN_STAGE, 'flow_context'):
+            flow_context = build_flow_context(wrk_index=wrk_index, flow_name=flow_name, mapping_meta=mapping_meta,
+                                              validation=validation, diagnostics=diagnostics, run_metrics=run_metrics)
+        if flow_context is None:
+            return
 
         # Вывод информации в файл
         # Каталог для файлов потока
         out_path_flow = os.path.join(out_path, flow_name)
         logging.info(f'Каталог потока: {out_path_flow}')
 
-        export_data = ExportData(templates_path=Config.templates_path, path=out_path_flow, flow_context=flow_context)
+        # Файлы потока подготавливаются во временном каталоге, если задан режим публикации
+        export_path = out_path_flow if staging == STAGING_NONE else staged_flow_path(out_path, flow_name)
+        export_data = ExportData(templates_path=Config.templates_path, path=export_path, flow_context=flow_context,
+                                 live_path=out_path_flow, write_executor=write_executor)
 
         # Формируем файлы описания потока
-        export_data.generate_files()
+        error_count = diagnostics.error_count
+        with run_metrics.span(SPAN_STAGE, 'export'):
+            export_data.generate_files()
+
+        writer = export_data.writer
+        logging.info(f'Файлы потока: создано - {writer.created}, изменено - {writer.changed}, '
+                     f'без изменений - {writer.unchanged}')
+
+        if staging == STAGING_FLOW:
+            # Каталог потока заменяется, только если все файлы потока записаны
+            if diagnostics.error_count == error_count:
+                _publish_flow(out_path, flow_name, diagnostics)
+            else:
+                discard_flow(out_path, flow_name)
+                logging.error(f'Каталог потока "{flow_name}" не изменен')
 
         logging.info(f'Файлы потока "{flow_name}" сформированы')
 
 
-    # Конец цикла по списку потоков #№№№################################################################################
+def _log_unchanged_flow_errors(flow_name: str, mapping_meta: MappingMeta, validation: MappingValidation,
+                               diagnostics: Diagnostics) -> None:
+    """
+    Регистрирует результаты проверки маппинга для потока, который не формируется, т.к. не изменился
+    с предыдущего запуска. Проверяются те же таблицы, что и при формировании потока (build_flow_context)
+    """
+    for _, row in mapping_meta.get_mapping_list_by_flow(flow_name).iterrows():
+        sh_data = StreamHeaderData(row=row)
+        MappingValidation.log_errors(validation.get_by_src_table(sh_data.src_full_name), diagnostics, flow=flow_name)
+        MappingValidation.log_errors(validation.get_by_tgt_table(sh_data.tgt_full_name), diagnostics, flow=flow_name)
 
-    if Config.is_error:
-        logging.error(f'Один или более потоков не были сформированы из-за обнаруженных ошибок')
 
-    logging.info('')
+def _publish_flow(out_path: str, flow_name: str, diagnostics: Diagnostics) -> bool:
+    """
+    Заменяет каталог потока подготовленным каталогом. Ошибка замены регистрируется как ошибка потока.
+
+    Returns: True, если каталог потока заменен
+    """
+    try:
+        publish_flow(out_path, flow_name)
+    except OSError as err:
+        diagnostics.error('Ошибка публикации каталога потока "%s": %s', flow_name, err, flow=flow_name)
+        return False
+    return True
+
+
+def build_flow_context(wrk_index: int, flow_name: str, mapping_meta: MappingMeta, validation: MappingValidation,
+                       diagnostics: Diagnostics, run_metrics: RunMetrics | None = None) -> FlowContext | None:
+    """Формирует описание одного потока (FlowContext) по данным маппинга.
+
+    Args:
+        wrk_index (int): Порядковый номер потока (для журнала)
+        flow_name (str): Имя потока
+        mapping_meta (MappingMeta): Данные маппинга
+        validation (MappingValidation): Результаты проверки маппинга
+        diagnostics (Diagnostics): Диагностика запуска
+        run_metrics (RunMetrics): Показатели запуска
+
+    Returns:
+        FlowContext: Описание потока. None, если при обработке таблиц потока были ошибки
+    """
+
+    processed_dt = Config.config.get('processed_dt', 'processed_dt')
+    processed_dt_conversion = Config.config.get('processed_dt_conversion', 'second')
+    is_table_error = False
+
+    flow_context = FlowContext(flow_name, diagnostics, run_metrics)
+
+    # Цикл по списку целевых таблиц
+    for _, row in mapping_meta.get_mapping_list_by_flow(flow_name).iterrows():
+
+        logging.info('')
+        logging.info(f">>>>> Поток: {wrk_index + 1}: {flow_name}")
+
+        # Данные строки "Перечень загрузок Src-RDV" листа для таблицы
+        sh_data = StreamHeaderData(row=row)
+
+        # Умеем работать только с MART-таблицами
+        if sh_data.target_rdv_object_type != 'MART':
+            diagnostics.error("Программа не поддерживает обработку целевых объектов с типом %s",
+                              sh_data.target_rdv_object_type, flow=flow_name, table=sh_data.tgt_full_name)
+            continue
+
+        # Полное имя таблицы: схема + имя_таблицы
+        tgt_full_name = sh_data.tgt_full_name
+
+        # Данные для заданной целевой таблицы
+        tgt_mapping: DataFrame = mapping_meta.get_mapping_by_tgt_table(tgt_full_name)
+
+        logging.info('')
+
+        if len(tgt_mapping) == 0:
+            diagnostics.error("Не найдена таблица %s на листе 'Детали загрузок Src-RDV'", tgt_full_name,
+                              flow=flow_name, table=tgt_full_name)
+            is_table_error = True
+            continue
+
+        # Проверяем таблицу-источник
+        pattern: re.Pattern = Config.get_pattern('src_table_name_regexp')
+        if not pattern.match(sh_data.src_full_name):
+            diagnostics.error('Имя таблицы-источника "%s" на листе "Перечень загрузок Src-RDV"'
+                              ' не соответствует шаблону "%s"', sh_data.src_full_name, pattern.pattern,
+                              flow=flow_name, table=tgt_full_name)
+            is_table_error = True
+            continue
+
+        logging.info(f'Схема данных:     {sh_data.src_schema}')
+        logging.info(f'Таблица-источник: {sh_data.src_full_name}')
+
+        # Проверяем соответствие названия целевой таблицы шаблону
+        pattern: re.Pattern = Config.get_pattern('tgt_table_name_regexp')
+        if not pattern.match(tgt_full_name):
+            diagnostics.error('Целевая таблица: "%s" на листе "Перечень загрузок Src-RDV" '
+                              'не соответствует шаблону "%s"', tgt_full_name, pattern.pattern,
+                              flow=flow_name, table=tgt_full_name)
+            is_table_error = True
+            continue
+
+        logging.info(f'Целевая таблица:  {tgt_full_name}')
+
+        # Возвращает наименование (логическое) "источника" для заданной целевой таблицы - поле src_sd
+        src_cd: str | None = mapping_meta.get_src_cd_by_table(tgt_full_name)
+        if not src_cd:
+            diagnostics.error('Для целевой таблицы "%s" неверно задано/не задано имя источника', tgt_full_name,
+                              flow=flow_name, table=tgt_full_name)
+            logging.error('Имя источника задается в колонке "Expression" для поля "src_cd"')
+            is_table_error = True
+            continue
+
+        logging.info(f'Источник данных (src_cd): {src_cd}')
+
+        # Имя источника - Source_name
+        if not sh_data.source_system:
+            diagnostics.error('Для таблицы %s неверно задано/не задано поле "Источник данных'
+                              ' (транспорт)"/Source_name', tgt_full_name, flow=flow_name, table=tgt_full_name)
+            is_table_error = True
+            continue
+        logging.info(f'Система - Источник данных: {sh_data.source_system}')
+
+        # Алгоритм - Algorithm_UID
+        algorithm_uid: str = sh_data.algorithm_uid
+        if not algorithm_uid:
+            diagnostics.error('Для таблицы %s неверно задано/не задано поле "UID алгоритма"/"Algorithm_UID"',
+                              tgt_full_name, flow=flow_name, table=tgt_full_name)
+            is_table_error = True
+            continue
+        logging.info(f'Код алгоритма: {algorithm_uid}')
+
+        subalgorithm_uid: str = str(sh_data.subalgorithm_uid).strip()
+        if not subalgorithm_uid:
+            diagnostics.error('Для таблицы %s неверно задано/не задано поле "UID субалгоритма"/"Sub_UID"',
+                              tgt_full_name, flow=flow_name, table=tgt_full_name)
+            is_table_error = True
+            continue
+
+        if not subalgorithm_uid.isdigit():
+            diagnostics.error('Поле "UID суб-алгоритма"/"Sub_UID" должно быть целым числом', flow=flow_name, table=tgt_full_name)
+            logging.error(f'Код суб-алгоритма: "{subalgorithm_uid}"')
+            is_table_error = True
+            continue
+
+        logging.info(f'Код суб-алгоритма: "{subalgorithm_uid}"')
+
+        ceh_resource: str = "ceh." + tgt_full_name
+
+        # Внешняя таблица - источник
+        source_name_schema = Config.config.get('source_name_schema', sh_data.src_schema)
+        source_system = Config.config.get('source_name', sh_data.source_system)
+
+        source = Source(system=source_system, schema=source_name_schema, table=sh_data.src_table,
+                        algorithm_uid=algorithm_uid, algorithm_uid_2=subalgorithm_uid, ceh_resource=ceh_resource,
+                        src_cd=src_cd, data_capture_mode=Config.data_capture_mode)
+
+        # Поля таблицы - источника
+        src_mapping = mapping_meta.get_mapping_by_src_table(src_table=sh_data.src_full_name)
+        # Список полей - дубликатов в источнике
+        dupl = mapping.get_duplicate_list(df=src_mapping, column_name='src_attribute')
+
+        if len( dupl ) > 0:
+            logging.debug(f"В таблице-источнике {sh_data.src_full_name} указаны повторяющиеся названия полей")
+            logging.debug(str(dupl))
+            logging.debug('При формировании файла описания таблицы источника дубликаты будут удалены')
+
+        # Удаляем дубликаты имен полей из списка полей таблицы-источника
+        src_mapping = src_mapping.drop_duplicates(subset=['src_attribute'], keep='first')
+        # Результаты проверки типов полей источника
+        MappingValidation.log_errors(validation.get_by_src_table(sh_data.src_full_name), diagnostics, flow=flow_name)
+
+        # Формируем список полей источника
+        for s_row in src_mapping.to_dict('records'):
+            source.add_field(DataBaseField(name=s_row['src_attribute'], data_type=s_row['src_attr_datatype'],
+                                           comment=s_row['comment'], is_nullable=False, is_pk=s_row['src_pk']))
+
+        flow_context.add_source(source)
+        uni_resource_cd = source.resource_cd
+
+        # Целевая таблица
+        target = Target(schema=sh_data.tgt_schema, table = sh_data.tgt_table, src_cd=src_cd.lower(),
+                        object_type=sh_data.target_rdv_object_type, uni_resource_cd=uni_resource_cd)
+
+        # Секция "local_metrics". Данные формируются для каждой таблицы. Но используется перове значение.
+        local_metric: LocalMetric = (
+            LocalMetric(processed_dt_conversion=processed_dt_conversion,
+                        processed_dt=processed_dt,
+                        algo=sh_data.algorithm_uid,
+                        system=sh_data.source_system,
+                        schema=sh_data.src_schema,
+                        name=sh_data.src_table))
+        flow_context.add_local_metric(local_metric=local_metric)
+
+        flow_context.add_target(target)
+
+        delta_mode = Config.config.get("delta_mode", 'new')
+
+        mart_mapping: Mart = (
+            Mart(short_name=target.short_name, algorithm_uid=sh_data.algorithm_uid,
+                 algorithm_uid_2=sh_data.subalgorithm_uid, target=target.short_name, source=source.short_name,
+                 delta_mode=delta_mode, processed_dt=processed_dt, algo=sh_data.algorithm_uid,
+                 source_system=sh_data.source_system, source_schema=sh_data.src_schema,
+                 source_name=sh_data.src_table,
+                 table_name=sh_data.tgt_table,
+                 src_cd=src_cd, comment=sh_data.comment, uni_resource_cd=uni_resource_cd)
+        )
+
+        # Результаты проверки полей целевой таблицы
+        if MappingValidation.log_errors(validation.get_by_tgt_table(tgt_full_name), diagnostics, flow=flow_name):
+            is_table_error = True
+
+        #  Описание MART - таблицы со всеми "вложениями"
+        target_table = TargetTable(schema=sh_data.tgt_schema, table_name=sh_data.tgt_table, comment=sh_data.comment,
+                                   table_type=sh_data.target_rdv_object_type, src_cd=src_cd,
+                                   distribution_field=sh_data.distribution_field)
+
+        # Цикл по полям целевой таблицы. Каждая строка таблицы обрабатывается один раз
+        for f_row in tgt_mapping.to_dict('records'):
+            mart_field = MartField.create_mart_field(f_row)
+            mart_mapping.add_fields(mart_field)
+
+            if mart_field.is_hub_field:
+                logging.debug("Поле '%s' не будет добавлено в секцию 'field_map', т.к. присутствует в секции 'hub_map'",
+                              mart_field.tgt_field)
+
+                # Если rk-поле прописано в "attr:bk_object", то берем его оттуда
+                rk_field = f_row['tgt_attribute'] if len(f_row['attr:bk_object'].split('.')) == 2 else f_row['attr:bk_object'].split('.')[2]
+
+                mart_hub = HubMartField(rk_field=rk_field, hub_table=f_row['attr:bk_object'].split('.')[1],
+                                        business_key_schema=f_row['attr:bk_schema'],
+                                        on_full_null=f_row['attr_nulldefault'], src_attribute=f_row['src_attribute'],
+                                        src_type=f_row['src_attr_datatype'], expression=f_row['expression'],
+                                        field_type=f_row['tgt_attr_datatype'],
+                                        is_bk=f_row['is_pk'], schema=f_row['attr:bk_object'].split('.')[0],
+                                        mart_retain_key=f_row['tgt_attribute'])
+
+                # Привязываем hub к описанию mart-таблицы
+                mart_mapping.add_mart_hub_list(mart_hub=mart_hub)
+                # Привязываем hub к целевой таблице
+                target_table.add_hub_field(mart_hub)
+
+
+            # Привязываем поле к целевой таблице
+            data_base_field = DataBaseField(name=f_row["tgt_attribute"], data_type=f_row['tgt_attr_datatype'],
+                                            comment=f_row["comment"],
+                                            is_nullable=f_row["tgt_attr_mandatory"] == 'null',
+                                            is_pk=f_row["is_pk"],
+                                            is_hub_field=mart_field.is_hub_field)
+
+            target_table.add_field(field=data_base_field)
+
+
+        # Конец цикла по списку полей целевой таблицы ##############################################################
+
+        flow_context.add_target_table(target_table=target_table)
+
+        # Добавляем описание mart к потоку
+        flow_context.add_mart(mart_mapping)
+
+    # Конец цикла по списку таблиц #################################################################################
+
+    if is_table_error:
+        diagnostics.error('Файлы потока "%s" не были сформированы!', flow_name, flow=flow_name)
+        return None
+
+    # Секция tags формируется последней
+    flow_context.tags_formation()
+    flow_context.author = Config.author
+    flow_context.data_capture_mode = Config.data_capture_mode
+    flow_context.delta_mode = Config.delta_mode
+
+    return flow_context
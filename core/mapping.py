@@ -1,27 +1,53 @@
+import io
 import logging
 import re
 
+import openpyxl
 import pandas as pd
 from pandas import DataFrame
 
+from core import mapping_cache
 from core.config import Config
+from core.diagnostics import Diagnostics, SEVERITY_ERROR, SEVERITY_WARNING
 from core.exceptions import IncorrectMappingException
+from core.run_metrics import RunMetrics, SPAN_STAGE
 
 
-def _generate_mapping_df(file_data: bytes, sheet_name: str, header = 1):
+# Значения ячеек, которые считаются пустыми (совпадает со списком значений NaN "по умолчанию" в pandas.read_excel).
+# Например, строка 'null' в колонке 'Tgt_attr_mandatory' превращается в NaN.
+_NA_VALUES: frozenset = frozenset({'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+                                   '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'})
+# Общий объект "пустого" значения для всех ячеек
+_NAN: float = float('nan')
+
+
+def _cell_value(value):
     """
-    Трансформирует полученные данные EXCEL в тип DataFrame.
-    Обрабатываются только данные листа из sheet_name.
-    Проверяет в данных наличие колонок из списка.
+    Приводит значение ячейки EXCEL к виду, который формирует pandas.read_excel:
+    пустые значения -> NaN, целые числа с плавающей точкой -> int.
+    """
+    if value is None:
+        return _NAN
+    if isinstance(value, str):
+        return _NAN if value in _NA_VALUES else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _resolve_sheet_columns(header_row: tuple, sheet_name: str) -> dict[str, int]:
+    """
+    Находит позиции колонок из файла настроек в строке заголовка листа EXCEL.
+    Названия колонок из секции col_aliases файла настроек заменяются на названия колонок в программе.
 
     Параметры:
-        file_data: bytes
-            Данные в виде "строки", считанные их EXCEL-файла
+        header_row: tuple
+            Значения ячеек строки заголовка
         sheet_name: str
             Название листа в книге EXCEL
 
     Возвращаемое значение:
-        Объект с типом DataFrame.
+        Словарь {название_колонки_в_программе: номер_колонки_на_листе}.
     """
 
     # Список имен колонок из файла настроек
@@ -33,38 +59,29 @@ def _generate_mapping_df(file_data: bytes, sheet_name: str, header = 1):
     col_aliases = Config.excel_data_definition.get('col_aliases', dict())
     aliases_list = {key.lower().strip(): val.lower().strip() for key, val in col_aliases[sheet_name].items()}
 
-    # Преобразование данных в DataFrame.
-    # Читаем со строки с индексом 1 -> вторая строка сверху.
-    try:
-        mapping: DataFrame = pd.read_excel(io=file_data, sheet_name=sheet_name, header=header)
-    except Exception:
-        logging.exception("Ошибка преобразования данных в DataFrame")
-        raise
-
-    # Переводим названия колонок в нижний регистр
-    # rename_list - словарь {старое_название: новое_название}
-    rename_list = {col: col.lower().strip() for col in mapping.columns}
-    mapping = mapping.rename(columns=rename_list)
-
-    # Добавляем номер строки из EXCEL.
-    # Добавляем 2, так как читаем со второй строки, а нумерация начинается с "0"
-    indices = [ x + header + 1 for x in mapping.index.tolist()]
-    mapping['excel_row_num'] = indices
-    columns_list.append('excel_row_num')
+    # Названия колонок на листе в нижнем регистре: {название: номер_колонки}.
+    # При повторе названия берется первая колонка.
+    sheet_columns: dict[str, int] = dict()
+    for index, value in enumerate(header_row):
+        if value is not None:
+            sheet_columns.setdefault(str(value).lower().strip(), index)
 
     # Проверка полученных данных
     error: bool = False
+    positions: dict[str, int] = dict()
 
     # Находим соответствие между "Названием колонки в программе" и "Названием колонки на листе"
     # Цикл по списку колонок из конфигурационного файла
     for col_name in columns_list:
 
-        if not col_name in mapping.columns.values:
+        if col_name in sheet_columns:
+            positions[col_name] = sheet_columns[col_name]
 
+        else:
             alias: str | None = aliases_list.get(col_name, None)
-            if alias and alias in mapping.columns.values:
+            if alias and alias in sheet_columns:
                 logging.debug(f"Имя колонки '{alias}' на листе '{sheet_name}' заменено на '{col_name}'")
-                mapping = mapping.rename(columns={alias: col_name})
+                positions[col_name] = sheet_columns[alias]
 
             else:
                 logging.error(f"Колонка '{col_name}' не найдена на листе '{sheet_name}'")
@@ -75,13 +92,143 @@ def _generate_mapping_df(file_data: bytes, sheet_name: str, header = 1):
     if error:
         raise IncorrectMappingException("Ошибка в структуре данных EXCEL")
 
+    return positions
 
-    # Трансформация данных: оставляем в наборе только колонки из списка и не пустые строки
-    mapping = mapping[columns_list].dropna(how='all')
+
+def _generate_mapping_df(worksheet, sheet_name: str, header = 1) -> DataFrame:
+    """
+    Трансформирует данные листа EXCEL в тип DataFrame.
+    Строки листа считываются потоком, в памяти сохраняются только колонки из файла настроек.
+    Проверяет в данных наличие колонок из списка.
+
+    Параметры:
+        worksheet:
+            Лист книги EXCEL, открытой в режиме "только чтение"
+        sheet_name: str
+            Название листа в книге EXCEL
+        header: int
+            Индекс строки с названиями колонок
+
+    Возвращаемое значение:
+        Объект с типом DataFrame.
+    """
+
+    rows = worksheet.iter_rows(values_only=True)
+
+    # Пропускаем строки до строки с названиями колонок.
+    # Читаем со строки с индексом 1 -> вторая строка сверху.
+    header_row: tuple = ()
+    for _ in range(header + 1):
+        header_row = next(rows, ())
+
+    positions = _resolve_sheet_columns(header_row=header_row, sheet_name=sheet_name)
+
+    data: dict[str, list] = {col_name: [] for col_name in positions}
+    row_nums: list[int] = []
+
+    # Номер строки из EXCEL.
+    # Добавляем 2, так как читаем со второй строки, а нумерация начинается с "0"
+    excel_row_num = header
+    for row in rows:
+        excel_row_num += 1
+        row_len = len(row)
+
+        values = [_cell_value(row[pos]) if pos < row_len else _NAN for pos in positions.values()]
+
+        # Пустые строки не берем
+        if all(value is _NAN for value in values):
+            continue
+
+        for col_values, value in zip(data.values(), values):
+            col_values.append(value)
+        row_nums.append(excel_row_num)
+
+    mapping = DataFrame(data)
+    # Добавляем номер строки из EXCEL.
+    mapping['excel_row_num'] = row_nums
 
     return mapping
 
 
+def _read_mapping_sheets(file_data: bytes, sheet_names: list[str], header=1) -> dict[str, DataFrame]:
+    """
+    Считывает данные указанных листов книги EXCEL за один разбор файла.
+    Книга открывается в режиме "только чтение", остальные листы книги не обрабатываются.
+
+    Параметры:
+        file_data: bytes
+            Данные в виде "строки", считанные их EXCEL-файла
+        sheet_names: list[str]
+            Список названий листов в книге EXCEL
+        header: int
+            Индекс строки с названиями колонок
+
+    Возвращаемое значение:
+        Словарь {название_листа: DataFrame}.
+    """
+
+    try:
+        workbook = openpyxl.load_workbook(file_data, read_only=True, data_only=True, keep_links=False)
+    except Exception:
+        logging.exception("Ошибка преобразования данных в DataFrame")
+        raise
+
+    sheets: dict[str, DataFrame] = dict()
+    try:
+        for sheet_name in sheet_names:
+            if sheet_name not in workbook.sheetnames:
+                logging.error(f"Лист '{sheet_name}' не найден в книге EXCEL")
+                raise IncorrectMappingException("Ошибка в структуре данных EXCEL")
+
+            worksheet = workbook[sheet_name]
+            # Размеры листа, записанные в файле, могут быть неверными
+            worksheet.reset_dimensions()
+            sheets[sheet_name] = _generate_mapping_df(worksheet=worksheet, sheet_name=sheet_name, header=header)
+
+    except IncorrectMappingException:
+        raise
+    except Exception:
+        logging.exception("Ошибка преобразования данных в DataFrame")
+        raise
+    finally:
+        workbook.close()
+
+    return sheets
+
+
+def _load_mapping_sheets(file_data: io.BytesIO, sheet_names: list[str], header=1,
+                         use_cache: bool = True) -> dict[str, DataFrame]:
+    """
+    Считывает данные указанных листов книги EXCEL.
+    Считанные данные сохраняются в кэше (каталог mapping_cache_path) и при следующих запусках программы
+    для той же книги EXCEL загружаются из кэша без разбора файла.
+
+    Параметры:
+        file_data: io.BytesIO
+            Данные, считанные из EXCEL-файла
+        sheet_names: list[str]
+            Список названий листов в книге EXCEL
+        header: int
+            Индекс строки с названиями колонок
+        use_cache: bool
+            Использовать кэш
+
+    Возвращаемое значение:
+        Словарь {название_листа: DataFrame}.
+    """
+    cache_path: str = Config.mapping_cache_path
+    if not use_cache or not cache_path:
+        return _read_mapping_sheets(file_data=file_data, sheet_names=sheet_names, header=header)
+
+    key = mapping_cache.cache_key(file_data.getvalue(), sheet_names, header, Config.excel_data_definition)
+    sheets = mapping_cache.load_sheets(cache_path, key)
+    if sheets is None:
+        sheets = _read_mapping_sheets(file_data=file_data, sheet_names=sheet_names, header=header)
+        mapping_cache.save_sheets(cache_path, key, sheets, Config.mapping_cache_size)
+
+    return sheets
+
+
 def _is_duplicate(df: pd.DataFrame, field_name: str) -> bool:
     """
     Проверяет колонку DataFrame на наличие не пустых дубликатов
@@ -139,8 +286,21 @@ class MappingMeta:
     mapping_df: pd.DataFrame
     # Данные листа 'Перечень загрузок Src-RDV'
     mapping_list: pd.DataFrame
+    # Ошибки определения src_cd целевых таблиц. Индекс - tgt_table, колонки: error, value
+    src_cd_errors: pd.DataFrame
+
+    # Виды ошибок определения src_cd
+    SRC_CD_MISSING: str = 'missing'
+    SRC_CD_DUPLICATE: str = 'duplicate'
+    SRC_CD_NO_MATCH: str = 'no_match'
 
-    def __init__(self, byte_data):
+    def __init__(self, byte_data, diagnostics: Diagnostics | None = None, use_cache: bool = True,
+                 run_metrics: RunMetrics | None = None):
+
+        if diagnostics is None:
+            diagnostics = Diagnostics()
+        if run_metrics is None:
+            run_metrics = RunMetrics()
 
         is_error: bool = False
         tgt_pk: set = {'pk'}
@@ -155,22 +315,30 @@ class MappingMeta:
             else:
                 return False
 
+        # Книга EXCEL разбирается один раз, считываются только два листа
+        with run_metrics.span(SPAN_STAGE, 'excel_read'):
+            sheets = _load_mapping_sheets(file_data=byte_data,
+                                          sheet_names=['Перечень загрузок Src-RDV', 'Детали загрузок Src-RDV'],
+                                          use_cache=use_cache)
+
         # Проверка, очистка данных -------------------------------------------------------------------------------------
         # Перечень загрузок Src-RDV ------------------------------------------------------------------------------------
-        self.mapping_list = _generate_mapping_df(file_data=byte_data, sheet_name='Перечень загрузок Src-RDV')
+        self.mapping_list = sheets['Перечень загрузок Src-RDV']
 
         # Заменяем значения NaN на пустые строки.
         self.mapping_list.fillna({'flow_name':""}, inplace=True)
         # Не берем данные строки в которых название потока отсутствует.
-        self.mapping_list = self.mapping_list.query("flow_name != ''")
+        self.mapping_list = self.mapping_list.loc[self.mapping_list['flow_name'] != '']
 
         # Удаляем данные, которые не попадают в фильтр из файла конфигурации.
         # Список шаблонов имен потоков и/или имен потоков, которые будут обработаны.
-        wf_templates_list = Config.config.get('wf_templates_list', list('.+'))
+        wf_templates_list = Config.config.get('wf_templates_list', ['.+'])
         # Список потоков, имена которых соответствуют шаблонам
-        pattern = '|'.join(wf_templates_list)
+        pattern: re.Pattern = re.compile('|'.join(wf_templates_list))
         # Оставляем только строки, название потока в которых соответствуют шаблонам
-        self.mapping_list = self.mapping_list.query(f"flow_name.str.match('{pattern}')")
+        is_match = [isinstance(flow_name, str) and pattern.match(flow_name) is not None
+                    for flow_name in self.mapping_list['flow_name']]
+        self.mapping_list = self.mapping_list.loc[is_match]
 
         # Заменяем NaN на пустые строки
         self.mapping_list.fillna({'version_end': ""}, inplace=True)
@@ -182,15 +350,15 @@ class MappingMeta:
 
 
         # Не берем строки, в которых поле version_end не пустое
-        self.mapping_list = self.mapping_list.query("version_end == ''")
+        self.mapping_list = self.mapping_list.loc[self.mapping_list['version_end'] == '']
 
         # Список целевых таблиц. Проверяем наличие дубликатов в списке
         self._tgt_tables_list: list[str] = self.mapping_list['tgt_table'].dropna().tolist()
         visited: set = set()
         for tbl in self._tgt_tables_list:
             if tbl in visited:
-                logging.error(f"На листе 'Перечень загрузок Src-RDV' "
-                              f"присутствуют повторяющиеся названия таблиц: {tbl}")
+                diagnostics.error("На листе 'Перечень загрузок Src-RDV' "
+                                  "присутствуют повторяющиеся названия таблиц: %s", tbl, table=tbl)
                 is_error: bool = True
             else:
                 visited.add(tbl)
@@ -198,18 +366,20 @@ class MappingMeta:
         # Проверка на наличие дубликатов на листе 'Перечень загрузок Src-RDV'
         for field_name in ['algorithm_uid', 'tgt_table']:
             if _is_duplicate(df=self.mapping_list, field_name=field_name):
-                logging.error(f"На листе 'Перечень загрузок Src-RDV' найдены дубликаты в колонке '{field_name}'")
+                diagnostics.error("На листе 'Перечень загрузок Src-RDV' найдены дубликаты в колонке '%s'", field_name)
                 is_error: bool = True
 
         # Сортируем по имени потока/алгоритму
         self.mapping_list.sort_values(by=['flow_name', 'algorithm_uid'], inplace=True)
+        # Индекс строк листа 'Перечень загрузок Src-RDV': {имя_потока: позиции_строк_в_mapping_list}
+        self._flow_index: dict = self.mapping_list.groupby('flow_name', sort=False).indices
 
         # Детали загрузок Src-RDV --------------------------------------------------------------------------------------
 
         # Список типов полей в источнике, которые (типы) будут переименованы
         src_datatype_aliases: dict = Config.field_type_list.get('src_datatype_aliases', dict())
         if len(src_datatype_aliases) == 0:
-            Config.is_warning = True
+            diagnostics.warning('Не найден параметр "src_datatype_aliases" в файле конфигурации', log=False)
             logging.debug('Не найден параметр "src_datatype_aliases" в файле конфигурации')
             logging.debug("Замена типов полей источника производится не будет")
 
@@ -226,7 +396,8 @@ class MappingMeta:
             logging.debug("Замена типов полей для ресурсов производится не будет")
 
 
-        self.mapping_df = _generate_mapping_df(file_data=byte_data, sheet_name='Детали загрузок Src-RDV')
+        self.mapping_df = sheets['Детали загрузок Src-RDV']
+        del sheets
 
         # Оставляем только строки, в которых заполнено поле 'Tgt_table' или 'Src_table'
         self.mapping_df.dropna(subset=['tgt_table', 'src_table'], how='all', inplace=True)
@@ -234,9 +405,9 @@ class MappingMeta:
         # Заменяем NaN на пустые строки в колонке 'version_end'
         self.mapping_df.fillna({'version_end': ""}, inplace=True)
         # Не берем строки, в которых поле version_end не пустое
-        self.mapping_df = self.mapping_df.query("version_end == ''")
+        self.mapping_df = self.mapping_df.loc[self.mapping_df['version_end'] == '']
         # Оставляем только строки, которые соответствуют "оставленным" потокам
-        self.mapping_df = self.mapping_df.query(f"tgt_table in {self._tgt_tables_list}")
+        self.mapping_df = self.mapping_df.loc[self.mapping_df['tgt_table'].isin(self._tgt_tables_list)]
 
         # Преобразуем значения в "нужный" регистр
         self.mapping_df['src_table'] = self.mapping_df['src_table'].fillna(value="").str.strip().str.lower()
@@ -278,15 +449,18 @@ class MappingMeta:
 
         # Поле attr:nulldefault переименовано в attr_nulldefault для того, что-бы избежать ошибок внутри query()
         # Экранировать "обратной кавычкой" получается только одно поле с пробелами в названии
-        pattern = Config.get_regexp(name="hub_nulldefault", default="^(new_rk|good_default|delete_record)$")
-        # For columns with spaces in their name, you can use backtick quoting.
-        err_rows = self.mapping_df.query(f"`attr:conversion_type` == 'hub' and attr_nulldefault != '' and "
-                                         f"not attr_nulldefault.str.match('{pattern}')")
+        pattern: re.Pattern = Config.get_pattern(name="hub_nulldefault",
+                                                 default="^(new_rk|good_default|delete_record)$")
+        nulldefault = self.mapping_df['attr_nulldefault']
+        err_rows = self.mapping_df.loc[(self.mapping_df['attr:conversion_type'] == 'hub') & (nulldefault != '') &
+                                       ~nulldefault.str.match(pattern)]
 
         if len(err_rows) > 0:
-            logging.error(f"Значение в поле 'attr:nulldefault' не соответствует шаблону: '{pattern}'")
+            logging.error(f"Значение в поле 'attr:nulldefault' не соответствует шаблону: '{pattern.pattern}'")
             logging.error('\n' +
                           str(err_rows[['excel_row_num', 'tgt_table', 'tgt_attribute', 'tgt_attr_datatype', 'attr_nulldefault']]))
+            diagnostics.add_rows(SEVERITY_ERROR, "Значение в поле 'attr:nulldefault' не соответствует шаблону",
+                                 err_rows)
             is_error = True
 
         # Проверяем состав поля 'tgt_pk'
@@ -296,7 +470,8 @@ class MappingMeta:
             for line in str(err_rows[['excel_row_num', 'tgt_table', 'tgt_attribute', 'tgt_pk', 'tgt_attr_datatype']]).splitlines():
                 logging.error(line)
             logging.error(f'Допустимые значения: {tgt_pk}')
-            Config.is_warning = True
+            diagnostics.add_rows(SEVERITY_WARNING, "В поле 'tgt_pk' указаны значения, которые не будут обрабатываться",
+                                 err_rows)
 
         # "Разворачиваем" колонку Tgt_PK в отдельные признаки
         # self.mapping_df = self.mapping_df.assign(_pk=lambda _df: _df['tgt_pk'].str.
@@ -317,16 +492,61 @@ class MappingMeta:
         #                                          extract(r'(^|,)(?P<_rk>rk|bk)(,|$)')['_rk'])
 
         # Проверяем поля expression
-        exp_err = self.mapping_df.query("expression != '' and src_attribute != ''")
+        exp_err = self.mapping_df.loc[(self.mapping_df['expression'] != '') & (self.mapping_df['src_attribute'] != '')]
         if len(exp_err) > 0:
             logging.error("Поля 'expression' и 'src_attribut' взаимоисключающие и не могут быть заполнены одновременно")
 
             logging.error ('Список строк с ошибками:\n' + str(exp_err[['excel_row_num', 'src_table', 'src_attribute', 'expression', 'tgt_table', 'tgt_attribute']]))
+            diagnostics.add_rows(SEVERITY_ERROR, "Поля 'expression' и 'src_attribut' заполнены одновременно", exp_err)
             is_error = True
 
         if is_error:
             raise IncorrectMappingException("Ошибка в структуре данных")
 
+        # Индексы строк листа 'Детали загрузок Src-RDV': {имя_таблицы: позиции_строк_в_mapping_df}.
+        # Формируются один раз, что-бы не просматривать весь mapping_df для каждой таблицы.
+        self._tgt_table_index: dict = self.mapping_df.groupby('tgt_table', sort=False).indices
+        self._src_table_index: dict = self.mapping_df.groupby(self.mapping_df['src_table'].str.upper(),
+                                                              sort=False).indices
+
+        # Имена источников (src_cd) всех целевых таблиц
+        self._build_src_cd_index()
+
+    def _build_src_cd_index(self):
+        """
+        Выделяет имя источника (поле src_cd) для всех целевых таблиц за один проход по mapping_df.
+        Заполняет словарь {tgt_table: src_cd} и таблицу ошибок src_cd_errors.
+        """
+        pattern: re.Pattern = Config.get_pattern('src_cd_regexp')
+
+        src_cd_rows = self.mapping_df.loc[self.mapping_df['tgt_attribute'] == 'src_cd', ['tgt_table', 'expression']]
+        # Удаляем пробельные символы
+        src_cd_values = src_cd_rows['expression'].str.replace(r"\s", '', regex=True)
+        # Выделяем имя источника (первая группа шаблона).
+        # str.extract ищет совпадение в любом месте строки, поэтому шаблон привязывается к началу строки (как re.match)
+        match_pattern = re.compile(r'\A(?:' + pattern.pattern + ')', pattern.flags)
+        src_cd_names = src_cd_values.str.extract(match_pattern, expand=True).iloc[:, 0]
+
+        # Для таблицы должно быть ровно одно описание поля 'src_cd'
+        is_duplicate = src_cd_rows['tgt_table'].duplicated(keep=False)
+        # Значение не соответствует шаблону или имя источника пустое
+        is_no_match = ~is_duplicate & (src_cd_names.isna() | (src_cd_names == ''))
+        is_valid = ~is_duplicate & ~is_no_match
+
+        self._src_cd_by_table: dict[str, str] = dict(zip(src_cd_rows.loc[is_valid, 'tgt_table'],
+                                                         src_cd_names[is_valid]))
+
+        described_tables: set = set(src_cd_rows['tgt_table'])
+        missing_tables = [tbl for tbl in dict.fromkeys(self._tgt_tables_list) if tbl not in described_tables]
+        duplicate_tables = src_cd_rows.loc[is_duplicate, 'tgt_table'].unique().tolist()
+
+        self.src_cd_errors = pd.concat([
+            DataFrame({'tgt_table': missing_tables, 'error': self.SRC_CD_MISSING, 'value': ''}),
+            DataFrame({'tgt_table': duplicate_tables, 'error': self.SRC_CD_DUPLICATE, 'value': ''}),
+            DataFrame({'tgt_table': src_cd_rows.loc[is_no_match, 'tgt_table'].values, 'error': self.SRC_CD_NO_MATCH,
+                       'value': src_cd_values[is_no_match].values}),
+        ]).set_index('tgt_table')
+
 
     def get_tgt_tables_list(self) -> list[str]:
         """
@@ -334,11 +554,17 @@ class MappingMeta:
         """
         return self._tgt_tables_list
 
+    def get_mapping_list_by_flow(self, flow_name: str) -> pd.DataFrame:
+        """
+        Возвращает список (DataFrame) строк листа 'Перечень загрузок Src-RDV' для заданного потока
+        """
+        return self.mapping_list.iloc[self._flow_index.get(flow_name, [])]
+
     def get_mapping_by_tgt_table(self, tgt_table: str) -> pd.DataFrame:
         """
         Возвращает список (DataFrame) строк для заданной целевой таблицы
         """
-        df: DataFrame = self.mapping_df[self.mapping_df['tgt_table'] == tgt_table].dropna(how="all")
+        df: DataFrame = self.mapping_df.iloc[self._tgt_table_index.get(tgt_table, [])].dropna(how="all")
         return df
 
     def get_mapping_by_src_table(self, src_table: str) -> pd.DataFrame:
@@ -346,7 +572,7 @@ class MappingMeta:
         Возвращает список (DataFrame) строк для заданной целевой таблицы
         """
         src_table = src_table.upper()
-        df = self.mapping_df[self.mapping_df['src_table'].str.upper() == src_table].dropna(how="all")
+        df = self.mapping_df.iloc[self._src_table_index.get(src_table, [])].dropna(how="all")
         df = df[['src_table', 'src_attribute', 'src_attr_datatype', 'src_pk', 'comment', 'tgt_attribute', 'tgt_attr_datatype']]
         return df
 
@@ -354,29 +580,25 @@ class MappingMeta:
         """
         Возвращает наименование источника для заданной целевой таблицы. Если None, то источник не найден
         """
-        src_cd_obj = self.mapping_df.query(f'tgt_table == "{tgt_table}" and tgt_attribute == "src_cd"')['expression']
-        if len(src_cd_obj) == 0:
-            logging.error(f"Не найдено поле 'src_cd' в таблице '{tgt_table}'")
-            return None
+        src_cd: str | None = self._src_cd_by_table.get(tgt_table)
+        if src_cd is not None:
+            return src_cd
 
-        if len(src_cd_obj) > 1:
-            logging.error(f"Найдено несколько описаний для поля 'src_cd' в таблице '{tgt_table}'")
-            return None
+        error: str = self.SRC_CD_MISSING
+        value: str = ''
+        if tgt_table in self.src_cd_errors.index:
+            error, value = self.src_cd_errors.loc[tgt_table, ['error', 'value']]
 
-        # src_cd: str = src_cd_obj.to_numpy()[0]
-        src_cd: str = src_cd_obj.iloc[0]
-        # Удаляем пробельные символы
-        src_cd = re.sub(r"\s", '', src_cd)
-        # Выделяем имя источника
-        pattern: str = Config.get_regexp('src_cd_regexp')
-        result = re.match(pattern, src_cd)
+        if error == self.SRC_CD_DUPLICATE:
+            logging.error(f"Найдено несколько описаний для поля 'src_cd' в таблице '{tgt_table}'")
 
-        if result is None:
+        elif error == self.SRC_CD_NO_MATCH:
+            pattern: str = Config.get_pattern('src_cd_regexp').pattern
             logging.error(f"Не найдено имя источника для таблицы '{tgt_table}' по шаблону '{pattern}'")
-            logging.error(f"Найденное значение: {src_cd}")
+            logging.error(f"Найденное значение: {value}")
             logging.info("Имя источника в ячейке EXCEL должно отображаться в формате: ='XXXX'")
-            return None
 
-        src_cd = result.groups()[0]
-        return src_cd
+        else:
+            logging.error(f"Не найдено поле 'src_cd' в таблице '{tgt_table}'")
 
+        return None
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+
+from pandas import DataFrame
+
+# Версия формата кэша. При изменении версии или порядка чтения листов EXCEL сохраненные данные не используются
+CACHE_VERSION: int = 1
+# Расширение файлов кэша
+_CACHE_SUFFIX: str = '.pkl'
+# Количество сохраняемых версий маппинга "по умолчанию"
+DEFAULT_CACHE_SIZE: int = 5
+
+
+def default_cache_path() -> str:
+    """
+    Каталог кэша текущего пользователя: %LOCALAPPDATA% (Windows) или $XDG_CACHE_HOME, ~/.cache (linux)
+    """
+    base_path = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') \
+        or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base_path, 'ceh-rdv-generator-II', 'mapping')
+
+
+def _is_private(path: str) -> bool:
+    """
+    Проверяет, что каталог/файл принадлежит текущему пользователю и не доступен другим пользователям на запись.
+    Данные кэша считываются с помощью pickle, поэтому файлы, которые мог изменить другой пользователь, не используются.
+    В Windows проверка не выполняется: каталог LOCALAPPDATA доступен только пользователю.
+    """
+    if not hasattr(os, 'getuid'):
+        return True
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+
+def cache_key(file_data: bytes, sheet_names: list[str], header: int, excel_data_definition: dict) -> str:
+    """
+    Ключ кэша: хэш содержимого книги EXCEL, списка листов и настроек чтения листов (excel_data_definition)
+    """
+    digest = hashlib.sha256()
+    digest.update(str(CACHE_VERSION).encode())
+    digest.update(json.dumps([sheet_names, header, excel_data_definition], sort_keys=True, default=str).encode())
+    digest.update(file_data)
+    return digest.hexdigest()
+
+
+def load_sheets(cache_path: str, key: str) -> dict[str, DataFrame] | None:
+    """
+    Считывает из кэша данные листов книги EXCEL. Если данные отсутствуют или повреждены, то возвращается None
+    """
+    file_path = os.path.join(cache_path, key + _CACHE_SUFFIX)
+    if not os.path.isfile(file_path):
+        return None
+
+    if not (_is_private(cache_path) and _is_private(file_path)):
+        logging.warning(f'Файл кэша "{file_path}" или его каталог принадлежит другому пользователю или доступен '
+                        f'другим пользователям на запись. Данные будут считаны из файла EXCEL')
+        return None
+
+    try:
+        with open(file_path, 'rb') as f:
+            sheets = pickle.load(f)
+    except Exception:
+        logging.warning(f'Не удалось прочитать файл кэша "{file_path}". Данные будут считаны из файла EXCEL')
+        _remove(file_path)
+        return None
+
+    # Дата изменения файла используется при удалении устаревших версий. Ошибка изменения даты не важна
+    try:
+        os.utime(file_path)
+    except OSError:
+        pass
+    logging.info(f'Данные маппинга загружены из кэша "{file_path}"')
+    return sheets
+
+
+def save_sheets(cache_path: str, key: str, sheets: dict[str, DataFrame], cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+    """
+    Сохраняет в кэш данные листов книги EXCEL и удаляет устаревшие версии.
+    Ошибка записи не прерывает работу программы.
+    """
+    file_path = os.path.join(cache_path, key + _CACHE_SUFFIX)
+    try:
+        os.makedirs(cache_path, mode=0o700, exist_ok=True)
+        if not _is_private(cache_path):
+            logging.warning(f'Каталог кэша "{cache_path}" принадлежит другому пользователю или доступен другим '
+                            f'пользователям на запись. Данные маппинга не сохраняются')
+            return
+        # Файл записывается под временным именем и переименовывается, что-бы другой запуск программы
+        # не прочитал частично записанный файл
+        with tempfile.NamedTemporaryFile(dir=cache_path, suffix='.tmp', delete=False) as f:
+            pickle.dump(sheets, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, file_path)
+    except OSError as err:
+        logging.warning(f'Не удалось сохранить данные маппинга в кэш "{cache_path}": {err}')
+        return
+
+    evict(cache_path, cache_size)
+
+
+def evict(cache_path: str, cache_size: int) -> None:
+    """
+    Удаляет из кэша версии маппинга, которые дольше всего не использовались, оставляя cache_size последних версий
+    """
+    try:
+        entries = [entry for entry in os.scandir(cache_path)
+                   if entry.is_file() and entry.name.endswith(_CACHE_SUFFIX)]
+    except OSError:
+        return
+
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[max(cache_size, 0):]:
+        _remove(entry.path)
+
+
+def _remove(file_path: str) -> None:
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Файл с показателями последнего запуска. Находится в каталоге out_path
+METRICS_FILE: str = '.generator_metrics.json'
+# Количество потоков/шаблонов с наибольшим временем формирования в итоговой таблице
+TOP_N: int = 10
+
+# Виды измеряемых участков
+SPAN_STAGE: str = 'stage'        # Этап обработки
+SPAN_FLOW: str = 'flow'          # Формирование потока
+SPAN_TEMPLATE: str = 'template'  # Формирование файла по шаблону
+
+
+class RunMetrics:
+    """
+    Время выполнения и объем памяти этапов обработки, потоков и шаблонов одного запуска генератора.
+    Создается на каждый запуск и передается в MappingMeta, FlowContext и ExportData, как и Diagnostics.
+    Объем памяти измеряется с помощью tracemalloc, только если задан trace_memory (замедляет работу программы).
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        # (вид, имя, время_сек, пиковый_объем_памяти_байт)
+        self._spans: list[tuple[str, str, float, int | None]] = []
+        # Участки в порядке начала выполнения: {(вид, имя): None}
+        self._order: dict[tuple[str, str], None] = dict()
+        # Для вложенных участков: [объем_памяти_в_начале_участка, пиковый_объем_памяти]
+        self._memory_stack: list[list[int]] = []
+        self._started_tracing: bool = False
+
+        self.files_written: int = 0
+        self.files_unchanged: int = 0
+        self.bytes_written: int = 0
+
+    def start(self) -> None:
+        """
+        Включает измерение объема памяти, если задан trace_memory
+        """
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def span(self, kind: str, name: str):
+        """
+        Измеряет время выполнения (и пиковый объем памяти) участка программы.
+
+        Args:
+            kind: Вид участка: SPAN_STAGE, SPAN_FLOW или SPAN_TEMPLATE
+            name: Имя этапа, потока или шаблона
+        """
+        self._order.setdefault((kind, name))
+
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._memory_stack:
+                self._memory_stack[-1][1] = max(self._memory_stack[-1][1], peak)
+            self._memory_stack.append([current, current])
+            tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+
+            memory = None
+            if tracing:
+                _, peak = tracemalloc.get_traced_memory()
+                start_memory, inner_peak = self._memory_stack.pop()
+                peak = max(peak, inner_peak)
+                memory = peak - start_memory
+                if self._memory_stack:
+                    self._memory_stack[-1][1] = max(self._memory_stack[-1][1], peak)
+
+            self._spans.append((kind, name, elapsed, memory))
+
+    def count_files(self, written: int, unchanged: int, bytes_written: int) -> None:
+        self.files_written += written
+        self.files_unchanged += unchanged
+        self.bytes_written += bytes_written
+
+    def merge(self, other: 'RunMetrics') -> None:
+        """
+        Добавляет показатели, собранные в другом процессе
+        """
+        self._spans.extend(other._spans)
+        for key in other._order:
+            self._order.setdefault(key)
+        self.count_files(other.files_written, other.files_unchanged, other.bytes_written)
+
+    def _summary(self, kind: str) -> list[dict]:
+        """
+        Показатели участков одного вида, сгруппированные по имени, по убыванию общего времени
+        """
+        summary: dict[str, dict] = dict()
+        for span_kind, name, elapsed, memory in self._spans:
+            if span_kind != kind:
+                continue
+            item = summary.setdefault(name, {'name': name, 'count': 0, 'time': 0.0, 'max_time': 0.0,
+                                             'memory': None})
+            item['count'] += 1
+            item['time'] += elapsed
+            item['max_time'] = max(item['max_time'], elapsed)
+            if memory is not None:
+                item['memory'] = max(item['memory'] or 0, memory)
+
+        for item in summary.values():
+            item['time'] = round(item['time'], 6)
+            item['max_time'] = round(item['max_time'], 6)
+
+        return sorted(summary.values(), key=lambda item: item['time'], reverse=True)
+
+    def to_dict(self, top_n: int = TOP_N) -> dict:
+        # Этапы выводятся в порядке начала выполнения
+        stages = {item['name']: item for item in self._summary(SPAN_STAGE)}
+        stage_order = [name for kind, name in self._order if kind == SPAN_STAGE and name in stages]
+        flows = self._summary(SPAN_FLOW)
+
+        return {
+            'trace_memory': self.trace_memory,
+            'stages': [stages[name] for name in stage_order],
+            'flow_count': len(flows),
+            'slowest_flows': flows[:top_n],
+            'slowest_templates': self._summary(SPAN_TEMPLATE)[:top_n],
+            'files_written': self.files_written,
+            'files_unchanged': self.files_unchanged,
+            'bytes_written': self.bytes_written,
+        }
+
+    def log_summary(self, top_n: int = TOP_N) -> None:
+        """
+        Выводит в журнал итоговую таблицу
+        """
+        metrics = self.to_dict(top_n)
+
+        def log_table(title: str, items: list[dict]) -> None:
+            if not items:
+                return
+            logging.info(title)
+            logging.info(f'  {"Имя":<50} {"Кол-во":>7} {"Всего, сек":>11} {"Макс, сек":>10}'
+                         + (f' {"Память, КБ":>11}' if self.trace_memory else ''))
+            for item in items:
+                line = f'  {item["name"]:<50} {item["count"]:>7} {item["time"]:>11.3f} {item["max_time"]:>10.3f}'
+                if self.trace_memory:
+                    memory = item['memory']
+                    line += f' {memory // 1024 if memory is not None else "":>11}'
+                logging.info(line)
+
+        logging.info('')
+        log_table('Время выполнения этапов:', metrics['stages'])
+        log_table(f'Потоки с наибольшим временем формирования (не более {top_n}):', metrics['slowest_flows'])
+        log_table(f'Шаблоны с наибольшим временем формирования (не более {top_n}):', metrics['slowest_templates'])
+        logging.info(f'Записано файлов: {self.files_written}, байт: {self.bytes_written}, '
+                     f'без изменений: {self.files_unchanged}')
+
+    def write(self, out_path: str, top_n: int = TOP_N) -> None:
+        """
+        Сохраняет показатели в файле METRICS_FILE. Ошибка записи не прерывает работу программы
+        """
+        file_path = os.path.join(out_path, METRICS_FILE)
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(top_n), f, ensure_ascii=False, indent=2)
+        except OSError as err:
+            logging.warning(f'Не удалось сохранить файл "{file_path}": {err}')
@@ -0,0 +1,81 @@
+import os
+import shutil
+
+# Каталог для подготовки файлов потоков. Находится в каталоге out_path, т.е. на той же файловой системе,
+# поэтому перенос подготовленного каталога потока выполняется переименованием
+STAGING_DIR: str = '.staging'
+
+# Режимы публикации файлов потоков
+STAGING_NONE: str = 'none'  # Файлы записываются непосредственно в каталог потока
+STAGING_FLOW: str = 'flow'  # Каталог потока заменяется сразу после формирования потока
+STAGING_RUN: str = 'run'    # Каталоги всех потоков заменяются после формирования всех потоков
+STAGING_MODES: list[str] = [STAGING_NONE, STAGING_FLOW, STAGING_RUN]
+
+
+def staged_flow_path(out_path: str, flow_name: str) -> str:
+    """
+    Каталог, в котором подготавливаются файлы потока
+    """
+    return os.path.join(out_path, STAGING_DIR, flow_name)
+
+
+def _backup_flow_path(out_path: str, flow_name: str) -> str:
+    """
+    Каталог, в который переносится прежний каталог потока на время замены.
+    Находится вне каталога STAGING_DIR, что-бы не быть удаленным вместе с ним
+    """
+    return os.path.join(out_path, '.' + flow_name + '.old')
+
+
+def publish_flow(out_path: str, flow_name: str) -> None:
+    """
+    Заменяет каталог потока подготовленным каталогом.
+    Файлы, которые больше не формируются, удаляются вместе с прежним каталогом потока.
+    Замена выполняется двумя переименованиями: прежний каталог потока переносится в резервный каталог,
+    затем подготовленный каталог переносится на его место. Между переименованиями каталог потока отсутствует.
+    Если второе переименование не выполнено, то прежний каталог потока восстанавливается и возбуждается исключение
+    OSError. Если не удалось и восстановление, то прежние файлы потока остаются в резервном каталоге
+    и восстанавливаются при следующей публикации потока.
+    """
+    live_path = os.path.join(out_path, flow_name)
+    staged_path = staged_flow_path(out_path, flow_name)
+    old_path = _backup_flow_path(out_path, flow_name)
+
+    if os.path.exists(old_path):
+        if os.path.isdir(live_path):
+            shutil.rmtree(old_path)
+        else:
+            # Резервный каталог остался после неудачной замены: восстанавливаем прежний каталог потока
+            os.rename(old_path, live_path)
+
+    moved = False
+    if os.path.isdir(live_path):
+        os.rename(live_path, old_path)
+        moved = True
+
+    try:
+        os.rename(staged_path, live_path)
+    except OSError:
+        if moved:
+            os.rename(old_path, live_path)
+        raise
+
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def discard_flow(out_path: str, flow_name: str) -> None:
+    """
+    Удаляет подготовленный каталог потока. Каталог потока не изменяется
+    """
+    shutil.rmtree(staged_flow_path(out_path, flow_name), ignore_errors=True)
+
+
+def is_staged(out_path: str, flow_name: str) -> bool:
+    return os.path.isdir(staged_flow_path(out_path, flow_name))
+
+
+def clear_staging(out_path: str) -> None:
+    """
+    Удаляет каталог подготовки файлов (в том числе оставшийся после аварийного завершения программы)
+    """
+    shutil.rmtree(os.path.join(out_path, STAGING_DIR), ignore_errors=True)
@@ -1,6 +1,11 @@
 import re
 import pandas as pd
 
+# Пробельные символы, которые удаляются из значений ячеек
+_WHITESPACE = re.compile(r"\s")
+# Нули после точки/запятой в номере подалгоритма
+_TRAILING_ZERO = re.compile(r"([.,])0$")
+
 
 class StreamHeaderData:
     """
@@ -13,23 +18,23 @@ class StreamHeaderData:
         self.row = row
         self.version = self.row["version"]
         self.version_end = self.row["version_end"]
-        self.algorithm_uid = re.sub(r"\s", '', self.row["algorithm_uid"])
+        self.algorithm_uid = _WHITESPACE.sub('', self.row["algorithm_uid"])
 
         self.subalgorithm_uid = str(self.row["subalgorithm_uid"])
         # Отсекаем нули после точки/запятой. Из-за странностей EXCEL
-        self.subalgorithm_uid = re.sub(r"([.,])0$", "", self.subalgorithm_uid)
+        self.subalgorithm_uid = _TRAILING_ZERO.sub("", self.subalgorithm_uid)
 
-        self.flow_name = re.sub(r"\s", '', self.row["flow_name"])
+        self.flow_name = _WHITESPACE.sub('', self.row["flow_name"])
 
-        self.tgt_full_name = re.sub(r"\s", '', self.row["tgt_table"])
+        self.tgt_full_name = _WHITESPACE.sub('', self.row["tgt_table"])
         self.tgt_schema = self.tgt_full_name.split('.')[0]
         self.tgt_table = self.tgt_full_name.split('.')[1]
         self.tgt_resource_cd = 'ceh.' + self.tgt_full_name
 
-        self.target_rdv_object_type = re.sub(r"\s", '', self.row["target_rdv_object_type"]).upper()
+        self.target_rdv_object_type = _WHITESPACE.sub('', self.row["target_rdv_object_type"]).upper()
 
         # source_table
-        self.src_full_name: str = re.sub(r"\s", '', self.row["src_table"])
+        self.src_full_name: str = _WHITESPACE.sub('', self.row["src_table"])
         self.src_full_name = self.src_full_name.upper()
 
         # Делаем такой разбор, что-бы не было исключения в этом месте.
@@ -43,11 +48,11 @@ class StreamHeaderData:
 
         self.src_resource_cd = '???'
 
-        self.source_system = re.sub(r"\s", '', self.row["source_name"]).upper()
-        self.scd_type = re.sub(r"\s", '', self.row["scd_type"])
+        self.source_system = _WHITESPACE.sub('', self.row["source_name"]).upper()
+        self.scd_type = _WHITESPACE.sub('', self.row["scd_type"])
         self.distribution_field = self.row["distribution_field"]
         self.distribution_field = self.distribution_field.lower().strip()
-        self.distribution_field = re.sub(r"\s", "", self.distribution_field)
+        self.distribution_field = _WHITESPACE.sub("", self.distribution_field)
 
         if type(self.distribution_field) is str:
             self.distribution_field_list = self.distribution_field.split(',')
@@ -0,0 +1,76 @@
+import os
+import re
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, TemplateSyntaxError
+
+# Шаблон описания uni-ресурса. Для схемы источника может быть задан отдельный шаблон resource.uni.table.<СХЕМА>.json
+UNI_TABLE_TEMPLATE: str = 'resource.uni.table.json'
+_UNI_TABLE_SCHEMA_TEMPLATE = re.compile(r'^resource\.uni\.table\.(?P<schema>.+)\.json$')
+
+
+def create_environment(templates_path: str, cache_path: str | None, auto_reload: bool = False) -> Environment:
+    """
+    Создает окружение Jinja для каталога шаблонов.
+    Скомпилированные шаблоны сохраняются на диске и используются при следующих запусках программы.
+
+    Args:
+        templates_path: Каталог шаблонов
+        cache_path: Каталог для скомпилированных шаблонов. None - каталог Jinja "по умолчанию" (отдельный для
+            каждого пользователя, доступный только ему). Пустая строка - скомпилированные шаблоны не сохраняются
+        auto_reload: Проверять дату изменения файлов шаблонов при каждом использовании шаблона.
+            Если не задан, то изменения шаблонов учитываются только при следующем запуске программы
+    """
+    bytecode_cache = None
+    if cache_path is None:
+        bytecode_cache = FileSystemBytecodeCache()
+    elif cache_path:
+        os.makedirs(cache_path, mode=0o700, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(directory=cache_path)
+
+    return Environment(loader=FileSystemLoader(templates_path), bytecode_cache=bytecode_cache,
+                       auto_reload=auto_reload)
+
+
+class TemplateSet:
+    """
+    Набор шаблонов, загруженных и скомпилированных один раз за время работы программы.
+    Если в окружении Jinja задан auto_reload, то шаблоны берутся из окружения при каждом использовании:
+    измененные файлы шаблонов компилируются заново.
+    """
+
+    def __init__(self, env: Environment):
+        self.env = env
+        self.templates: dict[str, Template] = dict()
+
+        # Шаблоны uni-ресурсов для отдельных схем: {СХЕМА: имя_шаблона}
+        self._uni_table_templates: dict[str, str] = dict()
+
+        for name in env.list_templates():
+            match = _UNI_TABLE_SCHEMA_TEMPLATE.match(name)
+            if match:
+                self._uni_table_templates[match.group('schema')] = name
+
+            if env.auto_reload:
+                continue
+            try:
+                self.templates[name] = env.get_template(name)
+            except TemplateSyntaxError:
+                # Ошибка будет выдана при использовании шаблона
+                continue
+
+    def get(self, name: str) -> Template:
+        """
+        Возвращает шаблон по имени
+        """
+        template = self.templates.get(name)
+        if template is None:
+            # Шаблон отсутствует, содержит ошибку или задан auto_reload: шаблон (или исключение) формирует Jinja
+            template = self.env.get_template(name)
+        return template
+
+    def uni_table(self, schema: str) -> tuple[str, Template]:
+        """
+        Возвращает имя и шаблон описания uni-ресурса для схемы источника
+        """
+        name = self._uni_table_templates.get(schema.upper(), UNI_TABLE_TEMPLATE)
+        return name, self.get(name)
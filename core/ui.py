@@ -127,19 +127,22 @@ class MainWindow(tk.Tk):
         else:
             try:
 
-                mapping_generator(
+                # В режиме диалога все потоки формируются заново (как и до появления пакетного режима),
+                # т.к. в диалоге нет параметра --force
+                diagnostics = mapping_generator(
                     file_path=self.file_path.get(),
-                    out_path=Config.out_path
+                    out_path=Config.out_path,
+                    force=True
                 )
 
-                if Config.is_error:
+                if diagnostics.is_error:
                     msg = ("Во время обработки были ошибки.\n"
                            "Прочитайте описание ошибок (error) "
                            "в журнале работы программы!")
                     showerror("Ошибка", msg)
                     logging.info("Обработка завершена с ошибками")
 
-                elif Config.is_warning:
+                elif diagnostics.is_warning:
                     msg = ("Обработка завершена c предупреждениями.\n"
                            "Прочитайте предупреждения (warning) "
                            "в журнале работы программы.")
@@ -0,0 +1,306 @@
+import logging
+import re
+
+import pandas as pd
+from pandas import DataFrame
+
+from core.config import Config
+from core.diagnostics import Diagnostics, SEVERITY_ERROR, SEVERITY_WARNING
+from core.mapping import MappingMeta
+
+# Виды проверок
+CHECK_SRC_DATATYPE: str = 'src_attr_datatype'
+CHECK_TGT_DATATYPE: str = 'tgt_attr_datatype'
+CHECK_CORRESP_SRC_DATATYPE: str = 'corresp_src_datatype'
+CHECK_CORRESP_DATATYPE: str = 'corresp_datatype'
+CHECK_TGT_ATTR_NAME: str = 'tgt_attr_name_regexp'
+CHECK_TGT_ATTR_VALUE: str = 'tgt_attr_value'
+CHECK_BK_SCHEMA: str = 'bk_schema_regexp'
+CHECK_BK_OBJECT: str = 'bk_object_regexp'
+CHECK_PREDEFINED_DATATYPE: str = 'tgt_attr_predefined_datatype'
+CHECK_DISTRIBUTION_FIELD: str = 'distribution_field'
+
+# Колонки таблицы ошибок
+ERROR_COLUMNS: list[str] = ['sheet', 'excel_row_num', 'tgt_table', 'src_table', 'tgt_attribute', 'check', 'severity',
+                            'stop_flow', 'message', 'hint']
+
+_DETAILS_SHEET: str = 'Детали загрузок Src-RDV'
+_LIST_SHEET: str = 'Перечень загрузок Src-RDV'
+
+
+def _error_rows(rows: DataFrame, check: str, severity: str, message, stop_flow: bool = False, hint: str = '',
+                sheet: str = _DETAILS_SHEET) -> DataFrame:
+    """
+    Формирует строки таблицы ошибок для строк маппинга, не прошедших проверку.
+
+    Args:
+        rows: Строки маппинга с ошибками
+        check: Вид проверки
+        severity: Уровень ошибки
+        message: Функция формирования текста сообщения по строке маппинга (dict)
+        stop_flow: Признак того, что файлы потока не будут сформированы
+        hint: Дополнительное сообщение (выводится с уровнем warning)
+        sheet: Название листа EXCEL, к которому относится номер строки
+
+    Returns: DataFrame с колонками ERROR_COLUMNS
+    """
+    records = rows.to_dict('records')
+    return DataFrame({
+        'sheet': sheet,
+        'excel_row_num': [row.get('excel_row_num') for row in records],
+        'tgt_table': [row.get('tgt_table') for row in records],
+        'src_table': [row.get('src_table', '') for row in records],
+        'tgt_attribute': [row.get('tgt_attribute', '') for row in records],
+        'check': check,
+        'severity': severity,
+        'stop_flow': stop_flow,
+        'message': [message(row) for row in records],
+        'hint': hint,
+    }, columns=ERROR_COLUMNS)
+
+
+class MappingValidation:
+    """
+    Проверка данных листа 'Детали загрузок Src-RDV' (и колонки 'distribution_field' листа 'Перечень загрузок Src-RDV')
+    до формирования потоков. Все проверки выполняются один раз для всего маппинга.
+    Результат - таблица ошибок errors, которую использует цикл формирования потоков.
+    """
+
+    # Таблица ошибок. Колонки: ERROR_COLUMNS
+    errors: DataFrame
+
+    def __init__(self, mapping_meta: MappingMeta):
+
+        self.mapping_df = mapping_meta.mapping_df
+        self.mapping_list = mapping_meta.mapping_list
+
+        self.errors = pd.concat([
+            self._check_src_datatypes(),
+            self._check_tgt_datatypes(),
+            self._check_corresp_datatypes(),
+            self._check_tgt_attr_names(),
+            self._check_tgt_attr_values(),
+            self._check_hub_names(),
+            self._check_predefined_datatypes(),
+            self._check_distribution_fields(),
+        ], ignore_index=True)
+
+        # Индексы строк таблицы ошибок: {имя_таблицы: позиции_строк}
+        self._tgt_table_index: dict = self.errors.groupby('tgt_table', sort=False).indices
+        self._src_table_index: dict = self.errors.groupby(self.errors['src_table'].str.upper(), sort=False).indices
+
+    def _check_src_datatypes(self) -> DataFrame:
+        """
+        Проверка типов полей таблиц-источников. Дубликаты полей источника проверяются один раз.
+        Ошибки привязываются к таблице-источнику.
+        """
+        src_attr_datatypes = Config.field_type_list['src_attr_datatype']
+
+        src_fields = self.mapping_df.assign(_src_key=self.mapping_df['src_table'].str.upper())
+        src_fields = src_fields.drop_duplicates(subset=['_src_key', 'src_attribute'], keep='first')
+        rows = src_fields.loc[~src_fields['src_attr_datatype'].isin(src_attr_datatypes)]
+        errors = _error_rows(rows, check=CHECK_SRC_DATATYPE, severity=SEVERITY_WARNING,
+                             message=lambda row: f'Тип поля "{row['src_attribute']}" в таблице источнике '
+                                                 f'"{row['src_attr_datatype']}" не входит в список разрешенных типов')
+        # Проверка выполняется для таблицы-источника, а не для целевой таблицы
+        errors['tgt_table'] = None
+        return errors
+
+    def _check_tgt_datatypes(self) -> DataFrame:
+        """
+        Проверка типов полей целевых таблиц
+        """
+        tgt_attr_datatypes = Config.field_type_list['tgt_attr_datatype']
+
+        rows = self.mapping_df.loc[~self.mapping_df['tgt_attr_datatype'].isin(tgt_attr_datatypes)]
+        return _error_rows(rows, check=CHECK_TGT_DATATYPE, severity=SEVERITY_WARNING,
+                           message=lambda row: f'Тип поля "{row['tgt_attribute']}"/"{row['tgt_attr_datatype']}" '
+                                               f'в целевой таблице не входит в список разрешенных типов')
+
+    def _check_corresp_datatypes(self) -> DataFrame:
+        """
+        Проверка соответствия типов данных полей источника и целевой таблицы
+        """
+        corresp_datatype: dict = Config.field_type_list.get('corresp_datatype', dict())
+        if len(corresp_datatype) == 0:
+            return DataFrame(columns=ERROR_COLUMNS)
+
+        # Допустимые "пары" типов данных (тип_поля_источника, тип_поля_целевой_таблицы)
+        corresp_pairs: list[tuple] = [(src_type, tgt_type) for src_type, tgt_types in corresp_datatype.items()
+                                      for tgt_type in tgt_types]
+
+        df = self.mapping_df
+        is_src_attr = df['src_attribute'] != ''
+        is_unknown_src_type = is_src_attr & ~df['src_attr_datatype'].isin(corresp_datatype.keys())
+        is_corresp = pd.MultiIndex.from_arrays([df['src_attr_datatype'], df['tgt_attr_datatype']]).isin(corresp_pairs)
+
+        return pd.concat([
+            _error_rows(df.loc[is_unknown_src_type], check=CHECK_CORRESP_SRC_DATATYPE, severity=SEVERITY_WARNING,
+                        message=lambda row: f"Тип данных поля источника '{row['src_attr_datatype']}' "
+                                            f"отсутствует в 'corresp_datatype'"),
+            _error_rows(df.loc[is_src_attr & ~is_unknown_src_type & ~is_corresp], check=CHECK_CORRESP_DATATYPE,
+                        severity=SEVERITY_WARNING,
+                        message=lambda row: f"Тип данных '{row['tgt_attr_datatype']}' поля целевой таблицы "
+                                            f"'{row['tgt_attribute']}' не найден списке в 'corresp_datatype' "
+                                            f"{row['src_attr_datatype']}:{corresp_datatype[row['src_attr_datatype']]}"),
+        ], ignore_index=True)
+
+    def _check_tgt_attr_names(self) -> DataFrame:
+        """
+        Проверка соответствия названия полей целевой таблицы шаблону
+        """
+        pattern: re.Pattern = Config.get_pattern('tgt_attr_name_regexp')
+
+        rows = self.mapping_df.loc[~self.mapping_df['tgt_attribute'].str.match(pattern, na=False)]
+        return _error_rows(rows, check=CHECK_TGT_ATTR_NAME, severity=SEVERITY_ERROR,
+                           message=lambda row: f"Название поля целевой таблицы {row['tgt_attribute']} "
+                                               f"не соответствует шаблону '{pattern.pattern}'")
+
+    def _check_tgt_attr_values(self) -> DataFrame:
+        """
+        Проверка наличия данных для полей целевой таблицы
+        """
+        ignore_field_map_ctx_list: dict = Config.setting_up_field_lists['ignore_field_map_ctx_list']
+
+        df = self.mapping_df
+        rows = df.loc[(df['src_attribute'] == '') & (df['expression'] == '') &
+                      ~df['tgt_attribute'].isin(ignore_field_map_ctx_list)]
+        return _error_rows(rows, check=CHECK_TGT_ATTR_VALUE, severity=SEVERITY_WARNING,
+                           message=lambda row: f"Для поля {row['tgt_attribute']} целевой таблицы не указано "
+                                               f"поле в источнике (src_attr) или расчетное значение (expression)")
+
+    def _check_hub_names(self) -> DataFrame:
+        """
+        Контроль названия бк-схемы и имени хаба. Ошибка прерывает формирование потока.
+        """
+        pattern_bk_schema: re.Pattern = Config.get_pattern('bk_schema_regexp')
+        pattern_bk_object: re.Pattern = Config.get_pattern('bk_object_regexp')
+
+        df = self.mapping_df
+        is_hub = df['attr:conversion_type'] == 'hub'
+        bk_schemas = df['attr:bk_schema'].fillna('').astype(str)
+        bk_objects = df['attr:bk_object'].fillna('').astype(str)
+
+        return pd.concat([
+            _error_rows(df.loc[is_hub & ~bk_schemas.str.match(pattern_bk_schema)], check=CHECK_BK_SCHEMA,
+                        severity=SEVERITY_ERROR, stop_flow=True,
+                        message=lambda row: f'Имя бк-схемы "{row['attr:bk_schema']}" на листе "{_DETAILS_SHEET}"'
+                                            f' не соответствует шаблону "{pattern_bk_schema.pattern}"'),
+            _error_rows(df.loc[is_hub & ~bk_objects.str.match(pattern_bk_object)], check=CHECK_BK_OBJECT,
+                        severity=SEVERITY_ERROR, stop_flow=True,
+                        hint="Ожидаемая структура поля: СХЕМА.ТАБЛИЦА.RK-ПОЛЕ или СХЕМА.ТАБЛИЦА",
+                        message=lambda row: f'Имя хаба "{row['attr:bk_object']}" на листе "{_DETAILS_SHEET}"'
+                                            f' не соответствует шаблону "{pattern_bk_object.pattern}"'),
+        ], ignore_index=True)
+
+    def _check_predefined_datatypes(self) -> DataFrame:
+        """
+        Проверка полей целевой таблицы, тип которых фиксирован
+        """
+        tgt_attr_predefined_datatypes: dict = Config.field_type_list['tgt_attr_predefined_datatype']
+        if len(tgt_attr_predefined_datatypes) == 0:
+            return DataFrame(columns=ERROR_COLUMNS)
+
+        columns = ['tgt_attribute', 'tgt_attr_datatype', 'tgt_attr_mandatory']
+        rows = self.mapping_df.loc[self.mapping_df['tgt_attribute'].isin(tgt_attr_predefined_datatypes.keys())]
+        counts = rows.groupby(['tgt_table', 'tgt_attribute'], sort=False).size()
+
+        # Таблицы, в которых обязательный атрибут отсутствует
+        all_pairs = pd.MultiIndex.from_product([self.mapping_df['tgt_table'].dropna().unique(),
+                                                list(tgt_attr_predefined_datatypes.keys())],
+                                               names=['tgt_table', 'tgt_attribute'])
+        missing = all_pairs.difference(counts.index, sort=False).to_frame(index=False)
+        missing['excel_row_num'] = None
+
+        # Обязательный атрибут указан более одного раза
+        duplicate_keys = counts.index[counts > 1]
+        is_duplicate = pd.MultiIndex.from_arrays([rows['tgt_table'], rows['tgt_attribute']]).isin(duplicate_keys)
+        duplicates = rows.loc[is_duplicate]
+        duplicate_messages: dict = {key: str(group[columns])
+                                    for key, group in duplicates.groupby(['tgt_table', 'tgt_attribute'], sort=False)}
+
+        # Параметры обязательного атрибута указаны неверно
+        single = rows.loc[~is_duplicate]
+        expected = single['tgt_attribute'].map(tgt_attr_predefined_datatypes)
+        is_wrong = ((single['tgt_attr_datatype'] != expected.str[0]) |
+                    (single['tgt_attr_mandatory'] != expected.str[1]))
+        wrong = single.loc[is_wrong]
+        wrong = wrong.assign(_rows=[str(wrong.loc[[index], columns]) for index in wrong.index])
+
+        return pd.concat([
+            _error_rows(missing, check=CHECK_PREDEFINED_DATATYPE, severity=SEVERITY_ERROR,
+                        message=lambda row: f"Не найден обязательный атрибут '{row['tgt_attribute']}'"),
+            _error_rows(duplicates.drop_duplicates(subset=['tgt_table', 'tgt_attribute']),
+                        check=CHECK_PREDEFINED_DATATYPE, severity=SEVERITY_ERROR,
+                        message=lambda row: f"Обязательный атрибут '{row['tgt_attribute']}' указан более одного раза\n"
+                                            + duplicate_messages[(row['tgt_table'], row['tgt_attribute'])]),
+            _error_rows(wrong, check=CHECK_PREDEFINED_DATATYPE, severity=SEVERITY_ERROR,
+                        message=lambda row: f"Параметры обязательного атрибута '{row['tgt_attribute']}' указаны неверно\n"
+                                            + row['_rows']),
+        ], ignore_index=True)
+
+    def _check_distribution_fields(self) -> DataFrame:
+        """
+        Проверка полей из колонки 'distribution_field' листа 'Перечень загрузок Src-RDV':
+        поле должно присутствовать в списке полей целевой таблицы и иметь признак 'PK'.
+        """
+        dist = self.mapping_list[['tgt_table', 'distribution_field', 'excel_row_num']]
+        dist = dist.assign(tgt_attribute=dist['distribution_field'].astype(str).str.lower()
+                           .str.replace(r"\s", '', regex=True).str.split(','))
+        dist = dist.explode('tgt_attribute')
+        dist = dist.loc[dist['tgt_attribute'] != '']
+
+        fields = self.mapping_df[['tgt_table', 'tgt_attribute', 'is_pk']]
+        fields = fields.groupby(['tgt_table', 'tgt_attribute'], as_index=False, sort=False)['is_pk'].any()
+        dist = dist.merge(fields, on=['tgt_table', 'tgt_attribute'], how='left', indicator=True)
+
+        is_found = dist['_merge'] == 'both'
+        not_found = dist.loc[~is_found]
+        not_found_fields: dict = {tbl: sorted(group['tgt_attribute'])
+                                  for tbl, group in not_found.groupby('tgt_table', sort=False)}
+
+        return pd.concat([
+            _error_rows(dist.loc[is_found & (dist['is_pk'] == False)], check=CHECK_DISTRIBUTION_FIELD,
+                        severity=SEVERITY_WARNING, sheet=_LIST_SHEET,
+                        message=lambda row: f"Поле '{row['tgt_attribute']}' не имеющее признак 'PK' в колонке "
+                                            f"'Tgt_PK' указано в колонке 'Distribution_field' листа '{_LIST_SHEET}'"),
+            _error_rows(not_found.drop_duplicates(subset=['tgt_table']), check=CHECK_DISTRIBUTION_FIELD,
+                        severity=SEVERITY_ERROR, sheet=_LIST_SHEET,
+                        message=lambda row: f"Поля/поле '{not_found_fields[row['tgt_table']]}', из колонки "
+                                            f"'Distribution_field' листа '{_LIST_SHEET}', не найдены в колонке "
+                                            f"'Tgt_attr' на листе '{_DETAILS_SHEET}'"),
+        ], ignore_index=True)
+
+    def get_by_tgt_table(self, tgt_table: str) -> DataFrame:
+        """
+        Возвращает ошибки для заданной целевой таблицы
+        """
+        return self.errors.iloc[self._tgt_table_index.get(tgt_table, [])]
+
+    def get_by_src_table(self, src_table: str) -> DataFrame:
+        """
+        Возвращает ошибки для заданной таблицы-источника
+        """
+        errors = self.errors.iloc[self._src_table_index.get(src_table.upper(), [])]
+        return errors.loc[errors['check'] == CHECK_SRC_DATATYPE]
+
+    @staticmethod
+    def log_errors(errors: DataFrame, diagnostics: Diagnostics, flow: str | None = None) -> bool:
+        """
+        Выводит ошибки в журнал и регистрирует их в диагностике запуска.
+
+        Args:
+            errors: Строки таблицы ошибок
+            diagnostics: Диагностика запуска
+            flow: Имя потока
+
+        Returns: True, если найдены ошибки, при которых файлы потока не формируются
+        """
+        for error in errors.to_dict('records'):
+            diagnostics.add(error['severity'], error['message'], flow=flow,
+                            table=error['tgt_table'] or error['src_table'], excel_row_num=error['excel_row_num'])
+
+            if error['hint']:
+                logging.warning(error['hint'])
+
+        return bool(errors['stop_flow'].any())
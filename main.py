@@ -1,14 +1,12 @@
 import argparse
-import ctypes
 import logging
+import multiprocessing
 import os
 import pathlib
-import tkinter
 
 import pandas as pd
 
 from core.config import Config
-from core.ui import MainWindow
 
 format_str = "%(asctime)s %(levelname)s %(message)s"
 
@@ -35,11 +33,75 @@ def main() -> int:
         default='generator.yaml',
         help="Файл конфигурации"
     )
+
+    # Пакетный режим (без графического интерфейса): main.py generate --mapping X.xlsx --out DIR
+    subparsers = parser.add_subparsers(dest="command")
+    generate_parser = subparsers.add_parser(
+        "generate",
+        help="Формирование файлов потоков без графического интерфейса"
+    )
+    generate_parser.add_argument(
+        "-m", "--mapping",
+        type=str,
+        default=None,
+        help="EXCEL-файл маппинга. По умолчанию берется из параметра excel_file файла конфигурации"
+    )
+    generate_parser.add_argument(
+        "-o", "--out",
+        type=str,
+        default=None,
+        help="Каталог для формирования потоков. По умолчанию берется из параметра out_path файла конфигурации"
+    )
+    generate_parser.add_argument(
+        "--validate-only",
+        action="store_true",
+        help="Только проверка маппинга, файлы потоков не формируются"
+    )
+    generate_parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="Количество процессов для формирования потоков. 0 - по количеству процессоров"
+    )
+    generate_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Формировать все потоки, в том числе не изменившиеся с предыдущего запуска"
+    )
+    generate_parser.add_argument(
+        "--staging",
+        choices=["none", "flow", "run"],
+        default="none",
+        help="Подготовка файлов во временном каталоге и замена каталога потока: "
+             "flow - после формирования потока, run - после формирования всех потоков"
+    )
+    generate_parser.add_argument(
+        "--write-threads",
+        type=int,
+        default=0,
+        help="Количество потоков (threads) для записи файлов. 0 - файлы записываются без очереди"
+    )
+    generate_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Не использовать сохраненные данные маппинга, всегда считывать EXCEL-файл"
+    )
+    generate_parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Измерять объем памяти этапов обработки, потоков и шаблонов (замедляет работу программы)"
+    )
     args = parser.parse_args()
 
+    # Каталог для формирования потоков в пакетном режиме создается, если он отсутствует
+    out_path: str | None = None
+    if args.command == "generate" and args.out:
+        out_path = os.path.abspath(args.out)
+        os.makedirs(out_path, exist_ok=True)
+
     # Файл настройки программы.
     config_name: str = os.path.abspath(args.config)
-    Config.load_config(config_name=config_name)
+    Config.load_config(config_name=config_name, out_path=out_path)
 
     level = logging.INFO
     if Config.log_level == "INFO":
@@ -72,6 +134,35 @@ def main() -> int:
     pd.set_option('display.max_colwidth', 50)
     pd.set_option('display.width', 255)
 
+    if args.command == "generate":
+        # Модули графического интерфейса не загружаются
+        from core.batch import run_batch
+
+        mapping_file: str = args.mapping if args.mapping else Config.excel_file
+        exit_code = run_batch(file_path=mapping_file, out_path=Config.out_path, validate_only=args.validate_only,
+                              jobs=args.jobs, force=args.force, staging=args.staging,
+                              write_threads=args.write_threads, use_cache=not args.no_cache,
+                              trace_memory=args.trace_memory)
+    else:
+        exit_code = run_gui()
+
+    logging.info('STOP')
+    return exit_code
+
+
+def run_gui() -> int:
+    """
+    Запуск программы в режиме диалога (только Windows).
+    """
+    import ctypes
+    import tkinter
+
+    from core.ui import MainWindow
+
+    # Изменения файлов шаблонов учитываются без перезапуска программы
+    Config.template_auto_reload = True
+    Config.init_templates()
+
     win = MainWindow()
 
     # Смена иконки программы
@@ -105,12 +196,13 @@ def main() -> int:
 
     win.mainloop()
 
-    logging.info('STOP')
     return 0
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     exit_code = main()
     exit(exit_code)
-else:
+elif __name__ != "__mp_main__":
+    # __mp_main__ - модуль загружается процессом, формирующим потоки (--jobs, Windows)
     exit(100)